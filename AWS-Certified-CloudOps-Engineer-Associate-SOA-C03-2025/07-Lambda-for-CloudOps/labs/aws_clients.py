@@ -0,0 +1,46 @@
+"""
+Cached boto3 clients shared by the CloudOps labs
+Packaged next to lambda_function.py in the lab1, lab2 and lab3 zips and
+into the lab4 layer
+"""
+
+import os
+import threading
+
+THROTTLING_ERRORS = {'RequestLimitExceeded', 'Throttling', 'ThrottlingException', 'TooManyRequestsException'}
+# Errors caused by one instance in a batched call; any other error (auth, region, ...) fails the whole call
+INSTANCE_ERRORS = {'IncorrectInstanceState'}
+INSTANCE_ERROR_PREFIXES = ('InvalidInstanceID.',)
+
+# Clients are created on first use and reused for the container's lifetime
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(service, region=None):
+    """Return a cached boto3 client, creating it lazily on first use"""
+    region = region or os.environ.get('AWS_REGION', 'us-east-1')
+    key = (service, region)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+                client = boto3.client(service, region_name=region, config=Config(
+                    retries={'max_attempts': 5, 'mode': 'adaptive'},
+                    max_pool_connections=20,
+                    connect_timeout=5,
+                    read_timeout=30,
+                    tcp_keepalive=True
+                ))
+                _clients[key] = client
+    return client
+
+def error_code(error):
+    """AWS error code of a botocore ClientError, or None for any other exception"""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+def is_instance_error(code):
+    """True if the error code points at one instance rather than the whole call"""
+    return code in INSTANCE_ERRORS or (code or '').startswith(INSTANCE_ERROR_PREFIXES)
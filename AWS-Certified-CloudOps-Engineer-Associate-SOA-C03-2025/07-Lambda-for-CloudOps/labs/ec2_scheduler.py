@@ -0,0 +1,151 @@
+"""
+Shared EC2 scheduler engine for the CloudOps start/stop labs
+Packaged next to lambda_function.py in the lab1, lab2 and lab3 deployment zips
+"""
+
+from datetime import datetime
+
+# Instance ids sent per start/stop call
+MAX_IDS_PER_CALL = 100
+
+# Only instances in these states can be part of a start/stop transition
+ACTIVE_STATES = ['pending', 'running', 'stopping', 'stopped']
+ALL_STATES = ACTIVE_STATES + ['shutting-down', 'terminated']
+
+# Action name -> (state the instance must be in, EC2 call, response key)
+TRANSITIONS = {
+    'stop_instances': ('running', 'stop_instances', 'StoppingInstances'),
+    'start_instances': ('stopped', 'start_instances', 'StartingInstances')
+}
+
+def parse_selector(selector):
+    """Parse 'Key=Value' (or a {'Key':..., 'Values': [...]} dict for several values) into (key, values)"""
+    if isinstance(selector, dict):
+        return selector['Key'], set(selector['Values'])
+
+    # As before, everything after the first '=' is one value, commas included
+    key, sep, value = selector.partition('=')
+    if not sep or not key:
+        raise ValueError(f"Invalid tag selector '{selector}', expected Key=Value")
+    return key.strip(), {value.strip()}
+
+def parse_schedules(event):
+    """Normalise an event into a list of {'action', 'selectors'} schedules"""
+    if 'schedules' in event:
+        schedules = event['schedules']
+    else:
+        schedules = [{'action': event.get('action', 'list_instances'), 'tags': [event.get('tag', 'Environment=Dev')]}]
+
+    parsed = []
+    for schedule in schedules:
+        tags = schedule.get('tags') or [schedule.get('tag', 'Environment=Dev')]
+        parsed.append({
+            'action': schedule['action'],
+            'selectors': [parse_selector(tag) for tag in tags]
+        })
+    return parsed
+
+def fetch_inventory(ec2, selectors, states=None):
+    """Take one paginated snapshot of the instances matching any selector, filtered by EC2"""
+    # EC2 ANDs different filter names, so selectors on different keys need one query each;
+    # values for the same key are ORed inside a single tag:<Key> filter
+    values_by_key = {}
+    for key, values in selectors:
+        values_by_key.setdefault(key, set()).update(values)
+
+    inventory = {}
+    for key in sorted(values_by_key):
+        filters = [
+            {'Name': f'tag:{key}', 'Values': sorted(values_by_key[key])},
+            {'Name': 'instance-state-name', 'Values': states or ACTIVE_STATES}
+        ]
+        pages = ec2.get_paginator('describe_instances').paginate(
+            Filters=filters, PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    inventory[instance['InstanceId']] = {
+                        'InstanceId': instance['InstanceId'],
+                        'State': instance['State']['Name'],
+                        'InstanceType': instance['InstanceType'],
+                        'LaunchTime': instance['LaunchTime'].isoformat(),
+                        'Tags': instance.get('Tags', []),
+                        'TagsDict': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                    }
+    return list(inventory.values())
+
+def matches(instance, selectors):
+    """True if the instance matches any selector"""
+    tags = instance['TagsDict']
+    return any(tags.get(key) in values for key, values in selectors)
+
+def plan_transitions(inventory, schedules):
+    """Compute the minimal set of start/stop transitions for all schedules against one snapshot"""
+    wanted = {}
+    conflicts = set()
+    for schedule in schedules:
+        action = schedule['action']
+        if action not in TRANSITIONS:
+            continue
+        for instance in inventory:
+            if not matches(instance, schedule['selectors']):
+                continue
+            instance_id = instance['InstanceId']
+            if wanted.get(instance_id, action) != action:
+                conflicts.add(instance_id)
+            wanted[instance_id] = action
+
+    plan = {action: [] for action in TRANSITIONS}
+    for instance in inventory:
+        action = wanted.get(instance['InstanceId'])
+        if action is None or instance['InstanceId'] in conflicts:
+            continue
+        # Only instances in the transition's source state need a call
+        if instance['State'] == TRANSITIONS[action][0]:
+            plan[action].append(instance)
+
+    return plan, sorted(conflicts)
+
+def apply_transitions(ec2, plan, chunk_size=MAX_IDS_PER_CALL):
+    """Apply planned transitions in chunks and report changed and failed instance ids"""
+    results = {}
+    for action, instances in plan.items():
+        _, call, response_key = TRANSITIONS[action]
+        changed = []
+        failed = []
+        ids = [instance['InstanceId'] for instance in instances]
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            try:
+                response = getattr(ec2, call)(InstanceIds=chunk)
+                changed.extend(change['InstanceId'] for change in response.get(response_key, []))
+            except Exception as e:
+                print(f"Failed to {action.split('_')[0]} {chunk}: {str(e)}")
+                failed.extend(chunk)
+        results[action] = {'changed': changed, 'failed': failed}
+    return results
+
+def run_schedules(ec2, schedules, dry_run=False):
+    """Evaluate all schedules against a single inventory snapshot and apply the transitions"""
+    selectors = [selector for schedule in schedules for selector in schedule['selectors']]
+    inventory = fetch_inventory(ec2, selectors)
+    plan, conflicts = plan_transitions(inventory, schedules)
+
+    if dry_run:
+        results = {action: {'changed': [], 'failed': []} for action in plan}
+    else:
+        results = apply_transitions(ec2, plan)
+
+    return {
+        'inventory_size': len(inventory),
+        'plan': plan,
+        'results': results,
+        'conflicts': conflicts,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def list_instances(ec2, selectors):
+    """List every instance matching any selector from one paginated snapshot"""
+    inventory = fetch_inventory(ec2, selectors, states=ALL_STATES)
+    return [instance for instance in inventory if matches(instance, selectors)]
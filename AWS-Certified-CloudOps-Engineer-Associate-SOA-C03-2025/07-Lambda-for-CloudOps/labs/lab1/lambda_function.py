@@ -1,18 +1,22 @@
 import json
-import boto3
 from datetime import datetime
 
+import ec2_scheduler
+from aws_clients import get_client
+
 def lambda_handler(event, context):
     """
     CloudOps Lambda function for EC2 instance management
     """
-    ec2 = boto3.client('ec2')
+    ec2 = get_client('ec2')
     
     action = event.get('action', 'list_instances')
     tag_filter = event.get('tag', 'Environment=Dev')
     
     try:
-        if action == 'stop_instances':
+        if 'schedules' in event:
+            return run_schedules(ec2, event)
+        elif action == 'stop_instances':
             return stop_instances(ec2, tag_filter)
         elif action == 'start_instances':
             return start_instances(ec2, tag_filter)
@@ -29,24 +33,27 @@ def lambda_handler(event, context):
             'body': json.dumps(f'Error: {str(e)}')
         }
 
+def run_schedules(ec2, event):
+    """Apply several tag schedules against one inventory snapshot"""
+    summary = ec2_scheduler.run_schedules(ec2, ec2_scheduler.parse_schedules(event), event.get('dry_run', False))
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f"Evaluated {len(event['schedules'])} schedules against {summary['inventory_size']} instances",
+            'planned': {action: [i['InstanceId'] for i in instances] for action, instances in summary['plan'].items()},
+            'results': summary['results'],
+            'conflicts': summary['conflicts'],
+            'timestamp': summary['timestamp']
+        })
+    }
+
 def stop_instances(ec2, tag_filter):
     """Stop running instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['running']}
-        ]
-    )
-    
-    instance_ids = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
+    schedules = [{'action': 'stop_instances', 'selectors': [ec2_scheduler.parse_selector(tag_filter)]}]
+    instance_ids = ec2_scheduler.run_schedules(ec2, schedules)['results']['stop_instances']['changed']
     
     if instance_ids:
-        ec2.stop_instances(InstanceIds=instance_ids)
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -67,22 +74,10 @@ def stop_instances(ec2, tag_filter):
 
 def start_instances(ec2, tag_filter):
     """Start stopped instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['stopped']}
-        ]
-    )
-    
-    instance_ids = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
+    schedules = [{'action': 'start_instances', 'selectors': [ec2_scheduler.parse_selector(tag_filter)]}]
+    instance_ids = ec2_scheduler.run_schedules(ec2, schedules)['results']['start_instances']['changed']
     
     if instance_ids:
-        ec2.start_instances(InstanceIds=instance_ids)
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -103,23 +98,15 @@ def start_instances(ec2, tag_filter):
 
 def list_instances(ec2, tag_filter):
     """List all instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]}
-        ]
-    )
-    
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances.append({
-                'InstanceId': instance['InstanceId'],
-                'State': instance['State']['Name'],
-                'InstanceType': instance['InstanceType'],
-                'LaunchTime': instance['LaunchTime'].isoformat()
-            })
+    instances = [
+        {
+            'InstanceId': instance['InstanceId'],
+            'State': instance['State'],
+            'InstanceType': instance['InstanceType'],
+            'LaunchTime': instance['LaunchTime']
+        }
+        for instance in ec2_scheduler.list_instances(ec2, [ec2_scheduler.parse_selector(tag_filter)])
+    ]
     
     return {
         'statusCode': 200,
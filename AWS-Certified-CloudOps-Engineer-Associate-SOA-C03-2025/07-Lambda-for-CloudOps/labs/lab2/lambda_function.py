@@ -1,14 +1,15 @@
 import json
-import boto3
-import os
 from datetime import datetime
 
+import ec2_scheduler
+from aws_clients import get_client
+
 def lambda_handler(event, context):
     """
     Scheduled CloudOps Lambda function for EC2 instance management
     Triggered by EventBridge rules for automated start/stop operations
     """
-    ec2 = boto3.client('ec2')
+    ec2 = get_client('ec2')
     
     # Get parameters from event or environment
     action = event.get('action', 'list_instances')
@@ -19,7 +20,9 @@ def lambda_handler(event, context):
     print(f"Action: {action}, Tag Filter: {tag_filter}")
     
     try:
-        if action == 'stop_instances':
+        if 'schedules' in event:
+            return run_schedules(ec2, event, source)
+        elif action == 'stop_instances':
             return stop_instances(ec2, tag_filter, source)
         elif action == 'start_instances':
             return start_instances(ec2, tag_filter, source)
@@ -43,31 +46,51 @@ def lambda_handler(event, context):
             })
         }
 
-def stop_instances(ec2, tag_filter, source):
-    """Stop running instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
+def run_schedules(ec2, event, source):
+    """Apply several tag schedules from one EventBridge rule against one inventory snapshot"""
+    schedules = ec2_scheduler.parse_schedules(event)
+    summary = ec2_scheduler.run_schedules(ec2, schedules, event.get('dry_run', False))
     
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['running']}
-        ]
-    )
+    for action, result in summary['results'].items():
+        print(f"{action}: changed {len(result['changed'])}, failed {len(result['failed'])}")
+    if summary['conflicts']:
+        print(f"Skipped instances matched by both start and stop schedules: {summary['conflicts']}")
     
-    instance_ids = []
-    instance_details = []
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f"Evaluated {len(schedules)} schedules against {summary['inventory_size']} instances",
+            'action': 'schedules',
+            'source': source,
+            'planned': {action: [i['InstanceId'] for i in instances] for action, instances in summary['plan'].items()},
+            'results': summary['results'],
+            'conflicts': summary['conflicts'],
+            'timestamp': summary['timestamp']
+        })
+    }
+
+def transition_instances(ec2, tag_filter, action):
+    """Run a single tag schedule and return the changed ids with their details"""
+    schedules = [{'action': action, 'selectors': [ec2_scheduler.parse_selector(tag_filter)]}]
+    summary = ec2_scheduler.run_schedules(ec2, schedules)
     
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
-            instance_details.append({
-                'InstanceId': instance['InstanceId'],
-                'InstanceType': instance['InstanceType'],
-                'LaunchTime': instance['LaunchTime'].isoformat()
-            })
+    instance_ids = summary['results'][action]['changed']
+    changed = set(instance_ids)
+    instance_details = [
+        {
+            'InstanceId': instance['InstanceId'],
+            'InstanceType': instance['InstanceType'],
+            'LaunchTime': instance['LaunchTime']
+        }
+        for instance in summary['plan'][action] if instance['InstanceId'] in changed
+    ]
+    return instance_ids, instance_details
+
+def stop_instances(ec2, tag_filter, source):
+    """Stop running instances with specific tag"""
+    instance_ids, instance_details = transition_instances(ec2, tag_filter, 'stop_instances')
     
     if instance_ids:
-        ec2.stop_instances(InstanceIds=instance_ids)
         print(f"Stopped {len(instance_ids)} instances: {instance_ids}")
         
         return {
@@ -96,29 +119,9 @@ def stop_instances(ec2, tag_filter, source):
 
 def start_instances(ec2, tag_filter, source):
     """Start stopped instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['stopped']}
-        ]
-    )
-    
-    instance_ids = []
-    instance_details = []
-    
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
-            instance_details.append({
-                'InstanceId': instance['InstanceId'],
-                'InstanceType': instance['InstanceType'],
-                'LaunchTime': instance['LaunchTime'].isoformat()
-            })
+    instance_ids, instance_details = transition_instances(ec2, tag_filter, 'start_instances')
     
     if instance_ids:
-        ec2.start_instances(InstanceIds=instance_ids)
         print(f"Started {len(instance_ids)} instances: {instance_ids}")
         
         return {
@@ -147,24 +150,16 @@ def start_instances(ec2, tag_filter, source):
 
 def list_instances(ec2, tag_filter):
     """List all instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]}
-        ]
-    )
-    
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances.append({
-                'InstanceId': instance['InstanceId'],
-                'State': instance['State']['Name'],
-                'InstanceType': instance['InstanceType'],
-                'LaunchTime': instance['LaunchTime'].isoformat(),
-                'Tags': instance.get('Tags', [])
-            })
+    instances = [
+        {
+            'InstanceId': instance['InstanceId'],
+            'State': instance['State'],
+            'InstanceType': instance['InstanceType'],
+            'LaunchTime': instance['LaunchTime'],
+            'Tags': instance['Tags']
+        }
+        for instance in ec2_scheduler.list_instances(ec2, [ec2_scheduler.parse_selector(tag_filter)])
+    ]
     
     print(f"Found {len(instances)} instances with tag {tag_filter}")
     
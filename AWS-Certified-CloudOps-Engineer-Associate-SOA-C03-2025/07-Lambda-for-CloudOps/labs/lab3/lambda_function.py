@@ -1,15 +1,24 @@
 import json
-import boto3
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import ec2_scheduler
+from aws_clients import THROTTLING_ERRORS, error_code, get_client, is_instance_error
+
+# Upper bound on EC2 calls in flight at once (fits the shared client's connection pool)
+MAX_CONCURRENT_CALLS = int(os.environ.get('MAX_CONCURRENT_CALLS', '10'))
+MAX_THROTTLE_RETRIES = 6
+
 def lambda_handler(event, context):
     """
     SNS-triggered Lambda function for CloudOps automation
     Processes SNS messages from CloudWatch alarms and takes automated actions
     """
-    sns = boto3.client('sns')
-    ec2 = boto3.client('ec2')
+    sns = get_client('sns')
+    ec2 = get_client('ec2')
     
     sns_topic_arn = os.environ.get('SNS_TOPIC_ARN')
     
@@ -40,28 +49,171 @@ def lambda_handler(event, context):
         }
 
 def process_sns_event(event, ec2, sns, sns_topic_arn):
-    """Process SNS event from CloudWatch alarm"""
+    """Process a batch of SNS alarm records with grouped EC2 calls and one digest notification"""
     results = []
+    failed_records = []
+    stops = {}  # instance id -> ids of the records that asked for it
     
-    for record in event['Records']:
-        if record['EventSource'] == 'aws:sns':
-            sns_message = json.loads(record['Sns']['Message'])
-            print(f"Processing SNS message: {json.dumps(sns_message)}")
-            
-            # Check if it's a CloudWatch alarm
-            if 'AlarmName' in sns_message:
-                result = handle_cloudwatch_alarm(sns_message, ec2, sns, sns_topic_arn)
-                results.append(result)
+    # Records are decoded one by one so malformed ones fail on their own
+    for record_id, result in map(process_record, event['Records']):
+        if result is None:
+            failed_records.append(record_id)
+            continue
+        if result is False:
+            continue
+        results.append(result)
+        if result['action'] == 'stop_instance':
+            stops.setdefault(result['instance_id'], []).append(record_id)
+    
+    # One chunked stop call covers every instance any alarm in the batch asked for
+    outcome = stop_instance_batch(ec2, list(stops))
+    for result in results:
+        if result['action'] != 'stop_instance':
+            continue
+        error = outcome.get(result['instance_id'])
+        if error:
+            result['status'] = 'error'
+            result['error'] = error
+            failed_records.extend(stops[result['instance_id']])
+        else:
+            result['status'] = 'success'
+    
+    failed_records = list(dict.fromkeys(failed_records))
+    if sns_topic_arn and (stops or failed_records):
+        send_notification(sns, sns_topic_arn,
+                        f"CloudOps Alert: {len(stops)} instances processed from {len(results)} alarms",
+                        build_digest(results, failed_records))
     
     return {
         'statusCode': 200,
         'body': json.dumps({
-            'message': 'SNS events processed successfully',
+            'message': 'SNS events processed successfully' if not failed_records else
+                       f'{len(failed_records)} records failed',
             'results': results,
             'timestamp': datetime.now().isoformat()
-        })
+        }),
+        # Honoured when the SNS topic feeds this function through an SQS queue
+        # with ReportBatchItemFailures, so only the failed records are retried
+        'batchItemFailures': [{'itemIdentifier': record_id} for record_id in failed_records]
+    }
+
+def process_record(record):
+    """Return (record_id, result); result is None on a decode failure and False for non-alarm messages"""
+    record_id = record_identifier(record)
+    try:
+        sns_message = decode_record(record)
+    except Exception as e:
+        print(f"Failed to decode record {record_id}: {str(e)}")
+        return record_id, None
+    
+    if sns_message is None or 'AlarmName' not in sns_message:
+        return record_id, False
+    
+    result = evaluate_alarm(sns_message)
+    result['record_id'] = record_id
+    return record_id, result
+
+def record_identifier(record):
+    """Identifier used to report a record as failed"""
+    if 'messageId' in record:
+        return record['messageId']
+    return record.get('Sns', {}).get('MessageId', 'unknown')
+
+def decode_record(record):
+    """Return the alarm message of an SNS record (direct or delivered through SQS)"""
+    if record.get('EventSource') == 'aws:sns':
+        return json.loads(record['Sns']['Message'])
+    if record.get('eventSource') == 'aws:sqs':
+        envelope = json.loads(record['body'])
+        return json.loads(envelope['Message'])
+    return None
+
+def evaluate_alarm(alarm_message):
+    """Decide which action an alarm asks for, without calling AWS"""
+    alarm_name = alarm_message.get('AlarmName', 'Unknown')
+    new_state = alarm_message.get('NewStateValue', 'Unknown')
+    reason = alarm_message.get('NewStateReason', 'No reason provided')
+    
+    print(f"Alarm: {alarm_name}, State: {new_state}, Reason: {reason}")
+    
+    # Get instance ID from alarm dimensions
+    instance_id = None
+    if 'Trigger' in alarm_message and 'Dimensions' in alarm_message['Trigger']:
+        for dimension in alarm_message['Trigger']['Dimensions']:
+            if dimension['name'] == 'InstanceId':
+                instance_id = dimension['value']
+                break
+    
+    if new_state == 'ALARM' and instance_id and 'high-cpu' in alarm_name.lower():
+        return {
+            'action': 'stop_instance',
+            'alarm_name': alarm_name,
+            'instance_id': instance_id,
+            'reason': 'high_cpu_alarm'
+        }
+    
+    return {
+        'action': 'alarm_processed',
+        'alarm_name': alarm_name,
+        'state': new_state,
+        'status': 'no_action_taken'
     }
 
+def stop_instance_batch(ec2, instance_ids):
+    """Stop instances in concurrent chunks, returning {instance_id: error} for the ones that failed"""
+    chunk_size = ec2_scheduler.MAX_IDS_PER_CALL
+    chunks = [instance_ids[i:i + chunk_size] for i in range(0, len(instance_ids), chunk_size)]
+    return run_concurrently(ec2, chunks, stop_chunk)
+
+def stop_chunk(ec2, chunk):
+    """Stop one chunk with throttling backoff, bisecting it only on per-instance errors"""
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        try:
+            ec2.stop_instances(InstanceIds=chunk)
+            print(f"Stopped {len(chunk)} instances due to high CPU usage: {chunk}")
+            return {}
+        except Exception as e:
+            code = error_code(e)
+            if code in THROTTLING_ERRORS and attempt < MAX_THROTTLE_RETRIES:
+                time.sleep(random.uniform(0, min(20, 0.5 * 2 ** attempt)))
+                continue
+            if is_instance_error(code) and len(chunk) > 1:
+                # One bad id fails the whole call, so retry both halves in parallel
+                print(f"Batch stop of {len(chunk)} instances failed ({str(e)}), bisecting")
+                middle = len(chunk) // 2
+                return run_concurrently(ec2, [chunk[:middle], chunk[middle:]], stop_chunk)
+            # Auth, region or other call-wide errors fail every id in the chunk at once
+            print(f"Failed to stop {chunk}: {str(e)}")
+            return {instance_id: str(e) for instance_id in chunk}
+
+def run_concurrently(ec2, chunks, worker):
+    """Run worker(ec2, chunk) for every chunk on a thread pool and merge the error dicts"""
+    errors = {}
+    if not chunks:
+        return errors
+    if len(chunks) == 1:
+        return worker(ec2, chunks[0])
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CALLS, len(chunks))) as executor:
+        for chunk_errors in executor.map(lambda chunk: worker(ec2, chunk), chunks):
+            errors.update(chunk_errors)
+    return errors
+
+def build_digest(results, failed_records):
+    """Summarise a whole batch in one notification"""
+    lines = []
+    for result in results:
+        if result['action'] != 'stop_instance':
+            continue
+        if result['status'] == 'success':
+            lines.append(f"Instance {result['instance_id']} stopped due to high CPU usage ({result['alarm_name']})")
+        else:
+            lines.append(f"Failed to stop instance {result['instance_id']} ({result['alarm_name']}): {result['error']}")
+    
+    if failed_records:
+        lines.append(f"{len(failed_records)} records failed: {', '.join(failed_records)}")
+    
+    return '\n'.join(dict.fromkeys(lines))
+
 def process_direct_invocation(event, ec2, sns, sns_topic_arn):
     """Process direct Lambda invocation"""
     action = event.get('action', 'list_instances')
@@ -93,78 +245,16 @@ def process_direct_invocation(event, ec2, sns, sns_topic_arn):
             'body': json.dumps('Invalid action')
         }
 
-def handle_cloudwatch_alarm(alarm_message, ec2, sns, sns_topic_arn):
-    """Handle CloudWatch alarm notifications"""
-    alarm_name = alarm_message.get('AlarmName', 'Unknown')
-    new_state = alarm_message.get('NewStateValue', 'Unknown')
-    reason = alarm_message.get('NewStateReason', 'No reason provided')
-    
-    print(f"Alarm: {alarm_name}, State: {new_state}, Reason: {reason}")
-    
-    # Get instance ID from alarm dimensions
-    instance_id = None
-    if 'Trigger' in alarm_message and 'Dimensions' in alarm_message['Trigger']:
-        for dimension in alarm_message['Trigger']['Dimensions']:
-            if dimension['name'] == 'InstanceId':
-                instance_id = dimension['value']
-                break
-    
-    if new_state == 'ALARM' and instance_id:
-        if 'high-cpu' in alarm_name.lower():
-            # Stop the instance due to high CPU
-            try:
-                ec2.stop_instances(InstanceIds=[instance_id])
-                message = f"Instance {instance_id} stopped due to high CPU usage"
-                print(message)
-                
-                # Send notification
-                if sns_topic_arn:
-                    send_notification(sns, sns_topic_arn, 
-                                    f"CloudOps Alert: {alarm_name}", 
-                                    message)
-                
-                return {
-                    'action': 'stop_instance',
-                    'instance_id': instance_id,
-                    'reason': 'high_cpu_alarm',
-                    'status': 'success'
-                }
-            except Exception as e:
-                error_msg = f"Failed to stop instance {instance_id}: {str(e)}"
-                print(error_msg)
-                return {
-                    'action': 'stop_instance',
-                    'instance_id': instance_id,
-                    'reason': 'high_cpu_alarm',
-                    'status': 'error',
-                    'error': str(e)
-                }
-    
-    return {
-        'action': 'alarm_processed',
-        'alarm_name': alarm_name,
-        'state': new_state,
-        'status': 'no_action_taken'
-    }
+def transition_instances(ec2, tag_filter, action):
+    """Run a single tag schedule through the shared scheduler and return the changed ids"""
+    schedules = [{'action': action, 'selectors': [ec2_scheduler.parse_selector(tag_filter)]}]
+    return ec2_scheduler.run_schedules(ec2, schedules)['results'][action]['changed']
 
 def stop_instances(ec2, tag_filter):
     """Stop running instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['running']}
-        ]
-    )
-    
-    instance_ids = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
+    instance_ids = transition_instances(ec2, tag_filter, 'stop_instances')
     
     if instance_ids:
-        ec2.stop_instances(InstanceIds=instance_ids)
         message = f'Stopped {len(instance_ids)} instances: {instance_ids}'
         print(message)
         
@@ -190,22 +280,9 @@ def stop_instances(ec2, tag_filter):
 
 def start_instances(ec2, tag_filter):
     """Start stopped instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]},
-            {'Name': 'instance-state-name', 'Values': ['stopped']}
-        ]
-    )
-    
-    instance_ids = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_ids.append(instance['InstanceId'])
+    instance_ids = transition_instances(ec2, tag_filter, 'start_instances')
     
     if instance_ids:
-        ec2.start_instances(InstanceIds=instance_ids)
         message = f'Started {len(instance_ids)} instances: {instance_ids}'
         print(message)
         
@@ -231,23 +308,15 @@ def start_instances(ec2, tag_filter):
 
 def list_instances(ec2, tag_filter):
     """List all instances with specific tag"""
-    tag_key, tag_value = tag_filter.split('=')
-    
-    response = ec2.describe_instances(
-        Filters=[
-            {'Name': f'tag:{tag_key}', 'Values': [tag_value]}
-        ]
-    )
-    
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances.append({
-                'InstanceId': instance['InstanceId'],
-                'State': instance['State']['Name'],
-                'InstanceType': instance['InstanceType'],
-                'LaunchTime': instance['LaunchTime'].isoformat()
-            })
+    instances = [
+        {
+            'InstanceId': instance['InstanceId'],
+            'State': instance['State'],
+            'InstanceType': instance['InstanceType'],
+            'LaunchTime': instance['LaunchTime']
+        }
+        for instance in ec2_scheduler.list_instances(ec2, [ec2_scheduler.parse_selector(tag_filter)])
+    ]
     
     return {
         'statusCode': 200,
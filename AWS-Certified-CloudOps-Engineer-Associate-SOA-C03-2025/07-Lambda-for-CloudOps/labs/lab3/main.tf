@@ -14,8 +14,24 @@ provider "aws" {
 # Create ZIP file for Lambda function
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_file = "lambda_function.py"
   output_path = "function.zip"
+
+  source {
+    content  = file("${path.module}/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  # Shared scheduler engine used by the start/stop/list actions
+  source {
+    content  = file("${path.module}/../ec2_scheduler.py")
+    filename = "ec2_scheduler.py"
+  }
+
+  # Cached boto3 clients
+  source {
+    content  = file("${path.module}/../aws_clients.py")
+    filename = "aws_clients.py"
+  }
 }
 
 # SNS Topic for CloudOps alerts
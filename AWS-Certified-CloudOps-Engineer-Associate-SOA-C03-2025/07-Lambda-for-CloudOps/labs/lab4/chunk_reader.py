@@ -0,0 +1,27 @@
+"""
+File-like reader over an iterator of text or bytes chunks
+Lets upload_fileobj stream generated content to S3 without building the whole body
+This file will be packaged in the Lambda Layer
+"""
+
+class ChunkReader:
+    """Minimal file-like reader over an iterator of chunks for upload_fileobj"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        # Never holds more than the requested size plus one chunk, so each read costs O(size)
+        self.buffer = bytearray()
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk.encode() if isinstance(chunk, str) else chunk
+        if size is None or size < 0 or size >= len(self.buffer):
+            data = bytes(self.buffer)
+            self.buffer.clear()
+        else:
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+        return data
@@ -89,10 +89,10 @@ def handle_bulk_operation(utils, operation, tag_key, tag_value, instance_ids):
     if not validate_instance_ids(instance_ids):
         return utils.format_response(400, None, "Invalid instance IDs provided")
     
-    # Perform bulk operation
+    # Perform bulk operation (chunked and concurrent, with per-instance results)
     result = utils.bulk_instance_operation(instance_ids, operation)
     
-    if result['success']:
+    if result['affected_instances']:
         return utils.format_response(200, result, result['message'])
     else:
         return utils.format_response(400, result, result['message'])
\ No newline at end of file
@@ -5,7 +5,15 @@ Uses the CloudOps Layer for common utilities
 
 import json
 import os
-from layer_utils import CloudOpsUtils, get_tag_value
+from datetime import datetime, timezone
+from chunk_reader import ChunkReader
+from layer_utils import CloudOpsUtils, get_client
+from pricing_catalog import get_catalog, HOURS_PER_MONTH
+
+# Instance fields copied into the detailed report, plus the tags promoted to columns
+REPORT_FIELDS = ('InstanceId', 'InstanceType', 'State', 'LaunchTime', 'PrivateIpAddress',
+                 'PublicIpAddress', 'Platform', 'Tenancy', 'Tags')
+REPORT_TAGS = ('Environment', 'Owner', 'Project')
 
 def lambda_handler(event, context):
     """
@@ -23,10 +31,10 @@ def lambda_handler(event, context):
         tag_value = event.get('tag_value', 'Dev')
         
         if report_type == 'summary':
-            return handle_resource_summary(utils)
+            return handle_resource_summary(utils, event.get('regions'))
         
         elif report_type == 'detailed':
-            return handle_detailed_report(utils, tag_key, tag_value)
+            return handle_detailed_report(utils, tag_key, tag_value, event.get('output_bucket'))
         
         elif report_type == 'cost_analysis':
             return handle_cost_analysis(utils, tag_key, tag_value)
@@ -38,125 +46,118 @@ def lambda_handler(event, context):
         print(f"Error: {str(e)}")
         return utils.format_response(500, None, f"Internal error: {str(e)}")
 
-def handle_resource_summary(utils):
-    """Generate resource summary report"""
-    summary = utils.get_resource_summary()
+def handle_resource_summary(utils, regions=None):
+    """Generate resource summary report for one or more regions"""
+    summary = utils.get_resource_summary(regions)
     
     if 'error' in summary:
         return utils.format_response(500, summary, "Failed to generate resource summary")
     
-    return utils.format_response(
-        200,
-        summary,
-        f"Resource summary for region {summary['region']}"
-    )
+    if 'regions' in summary:
+        message = f"Resource summary for regions {', '.join(summary['regions'])}"
+    else:
+        message = f"Resource summary for region {summary['region']}"
+    
+    return utils.format_response(200, summary, message)
 
-def handle_detailed_report(utils, tag_key, tag_value):
+def handle_detailed_report(utils, tag_key, tag_value, output_bucket=None):
     """Generate detailed instance report"""
     instances = utils.get_instances_by_tag(tag_key, tag_value)
-    
-    # Enhance instance data with additional details
-    detailed_instances = []
-    for instance in instances:
-        detailed_instance = instance.copy()
-        
-        # Add tag information
-        tags_dict = {}
-        for tag in instance['Tags']:
-            tags_dict[tag['Key']] = tag['Value']
-        
-        detailed_instance['TagsDict'] = tags_dict
-        detailed_instance['Environment'] = get_tag_value(instance['Tags'], 'Environment')
-        detailed_instance['Owner'] = get_tag_value(instance['Tags'], 'Owner')
-        detailed_instance['Project'] = get_tag_value(instance['Tags'], 'Project')
-        
-        detailed_instances.append(detailed_instance)
-    
-    # Group by state
-    by_state = {}
-    for instance in detailed_instances:
-        state = instance['State']
-        if state not in by_state:
-            by_state[state] = []
-        by_state[state].append(instance)
-    
-    # Group by instance type
-    by_type = {}
-    for instance in detailed_instances:
-        inst_type = instance['InstanceType']
-        if inst_type not in by_type:
-            by_type[inst_type] = 0
-        by_type[inst_type] += 1
+    columns, summary = build_report_columns(instances)
+    total = len(instances)
     
     report = {
         'filter': f"{tag_key}={tag_value}",
-        'total_instances': len(detailed_instances),
-        'instances': detailed_instances,
-        'summary': {
-            'by_state': {state: len(instances) for state, instances in by_state.items()},
-            'by_type': by_type
-        }
+        'total_instances': total,
+        'summary': summary
     }
     
+    if output_bucket:
+        # Stream the instances section to S3 instead of holding the whole body in memory
+        key = f"reports/detailed/{tag_key}={tag_value}/{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+        get_client('s3', utils.region).upload_fileobj(
+            ChunkReader(iter_report_json(report, columns)), output_bucket, key
+        )
+        report['location'] = f"s3://{output_bucket}/{key}"
+        return utils.format_response(200, report, f"Detailed report for {total} instances written to S3")
+    
+    report['instances'] = list(iter_report_rows(columns))
+    
     return utils.format_response(
         200,
         report,
-        f"Detailed report for {len(detailed_instances)} instances"
+        f"Detailed report for {total} instances"
     )
 
+def build_report_columns(instances):
+    """Convert instances to columns and count by state and type in a single pass"""
+    columns = {field: [] for field in REPORT_FIELDS + ('TagsDict',) + REPORT_TAGS}
+    appenders = [(field, columns[field].append) for field in REPORT_FIELDS]
+    tags_dicts = columns['TagsDict'].append
+    tag_appenders = [(tag, columns[tag].append) for tag in REPORT_TAGS]
+    by_state = {}
+    by_type = {}
+    
+    for instance in instances:
+        for field, append in appenders:
+            append(instance.get(field))
+        
+        tags = {tag['Key']: tag['Value'] for tag in instance['Tags']}
+        tags_dicts(tags)
+        for tag, append in tag_appenders:
+            append(tags.get(tag, 'N/A'))
+        
+        state = instance['State']
+        by_state[state] = by_state.get(state, 0) + 1
+        inst_type = instance['InstanceType']
+        by_type[inst_type] = by_type.get(inst_type, 0) + 1
+    
+    return columns, {'by_state': by_state, 'by_type': by_type}
+
+def iter_report_rows(columns):
+    """Yield one instance dict at a time from the report columns"""
+    names = list(columns)
+    for values in zip(*(columns[name] for name in names)):
+        yield dict(zip(names, values))
+
+def iter_report_json(report, columns):
+    """Yield the report as JSON text, emitting the instances section row by row"""
+    yield json.dumps(report)[:-1]
+    yield ', "instances": ['
+    for index, row in enumerate(iter_report_rows(columns)):
+        yield (', ' if index else '') + json.dumps(row)
+    yield ']}'
+
 def handle_cost_analysis(utils, tag_key, tag_value):
     """Generate cost analysis report"""
     instances = utils.get_instances_by_tag(tag_key, tag_value)
     
-    # Simple cost estimation (approximate hourly rates)
-    instance_costs = {
-        't3.micro': 0.0104,
-        't3.small': 0.0208,
-        't3.medium': 0.0416,
-        't3.large': 0.0832,
-        't3.xlarge': 0.1664,
-        't3.2xlarge': 0.3328,
-        'm5.large': 0.096,
-        'm5.xlarge': 0.192,
-        'm5.2xlarge': 0.384,
-        'c5.large': 0.085,
-        'c5.xlarge': 0.17
-    }
+    # Hourly rates come from the pricing catalog loaded once per container
+    pricing = get_catalog().price_instances(utils.region, instances)
+    hours = HOURS_PER_MONTH
     
     cost_analysis = {
         'filter': f"{tag_key}={tag_value}",
-        'instances': [],
-        'total_hourly_cost': 0,
-        'monthly_cost_estimate': 0,
-        'running_hourly_cost': 0,
-        'potential_savings': 0
+        'instances': [
+            {
+                'instance_id': instance['InstanceId'],
+                'instance_type': instance['InstanceType'],
+                'state': instance['State'],
+                'hourly_rate': rate,
+                'monthly_estimate': rate * hours
+            }
+            for instance, rate in zip(instances, pricing['rates'])
+        ],
+        'total_hourly_cost': pricing['total_hourly_cost'],
+        'monthly_cost_estimate': pricing['total_hourly_cost'] * hours,
+        'running_hourly_cost': pricing['running_hourly_cost'],
+        'running_monthly_cost': pricing['running_hourly_cost'] * hours,
+        'unpriced_instances': pricing['unpriced_instances']
     }
     
-    for instance in instances:
-        inst_type = instance['InstanceType']
-        hourly_rate = instance_costs.get(inst_type, 0.05)  # Default rate
-        
-        instance_cost = {
-            'instance_id': instance['InstanceId'],
-            'instance_type': inst_type,
-            'state': instance['State'],
-            'hourly_rate': hourly_rate,
-            'monthly_estimate': hourly_rate * 24 * 30
-        }
-        
-        cost_analysis['instances'].append(instance_cost)
-        cost_analysis['total_hourly_cost'] += hourly_rate
-        
-        if instance['State'] == 'running':
-            cost_analysis['running_hourly_cost'] += hourly_rate
-    
-    # Calculate estimates
-    cost_analysis['monthly_cost_estimate'] = cost_analysis['total_hourly_cost'] * 24 * 30
-    cost_analysis['running_monthly_cost'] = cost_analysis['running_hourly_cost'] * 24 * 30
-    
     # Potential savings if stopped instances were running
-    stopped_cost = cost_analysis['total_hourly_cost'] - cost_analysis['running_hourly_cost']
-    cost_analysis['potential_savings'] = stopped_cost * 24 * 30
+    stopped_cost = pricing['total_hourly_cost'] - pricing['running_hourly_cost']
+    cost_analysis['potential_savings'] = stopped_cost * hours
     
     return utils.format_response(
         200,
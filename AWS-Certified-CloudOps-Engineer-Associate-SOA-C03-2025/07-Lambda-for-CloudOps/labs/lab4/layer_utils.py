@@ -3,20 +3,150 @@ Common utilities for CloudOps Lambda functions
 This file will be packaged in the Lambda Layer
 """
 
+import hashlib
 import json
-import boto3
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
+from aws_clients import THROTTLING_ERRORS, error_code, get_client, is_instance_error
+
+# Instance ids sent per start/stop/reboot call and concurrent calls per operation
+MAX_IDS_PER_CALL = 100
+MAX_CONCURRENT_CALLS = 8
+MAX_THROTTLE_RETRIES = 6
+
+# Instance snapshots are reused for a few seconds; set CLOUDOPS_CACHE_DIR (e.g. /tmp/cloudops-cache)
+# to also keep them on local disk for warm containers
+SNAPSHOT_TTL_SECONDS = float(os.environ.get('CLOUDOPS_CACHE_TTL', '15'))
+SNAPSHOT_CACHE_DIR = os.environ.get('CLOUDOPS_CACHE_DIR')
+
+class InstanceSnapshotCache:
+    """Short-lived cache of instance lookups with single-flight loading"""
+    
+    def __init__(self, ttl: float = SNAPSHOT_TTL_SECONDS, cache_dir: str = SNAPSHOT_CACHE_DIR):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._entries = {}
+        self._inflight = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple, loader) -> List[Dict]:
+        """Return a fresh snapshot for key, sharing one loader call between concurrent callers"""
+        region = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                return list(entry[1])
+            
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                generation = self._generations.get(region, 0)
+        
+        if not owner:
+            return list(future.result())
+        
+        try:
+            entry = self._read_file(key)
+            loaded = entry is None
+            if loaded:
+                entry = (time.time(), loader())
+            with self._lock:
+                # Drop the result if the region was invalidated while loading; the check and the
+                # disk write share the lock with invalidate(), so a stale snapshot is never persisted
+                if self._generations.get(region, 0) == generation:
+                    self._entries[key] = entry
+                    if loaded:
+                        self._write_file(key, entry)
+            future.set_result(entry[1])
+            return list(entry[1])
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def invalidate(self, region: str) -> None:
+        """Forget every snapshot taken in a region"""
+        with self._lock:
+            self._generations[region] = self._generations.get(region, 0) + 1
+            for key in [k for k in self._entries if k[0] == region]:
+                del self._entries[key]
+            
+            # Snapshot files for the region go too, so a cold read can't serve them
+            if self.cache_dir and os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    if name.startswith(f'{region}-'):
+                        try:
+                            os.remove(os.path.join(self.cache_dir, name))
+                        except OSError:
+                            pass
+    
+    def _path(self, key: tuple) -> str:
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f'{key[0]}-{digest}.json')
+    
+    def _read_file(self, key: tuple):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - stored['timestamp'] >= self.ttl:
+            return None
+        return stored['timestamp'], stored['instances']
+    
+    def _write_file(self, key: tuple, entry: tuple) -> None:
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'timestamp': entry[0], 'instances': entry[1]}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to persist instance snapshot: {str(e)}")
+
+# Shared by every function that imports the layer in this container
+snapshot_cache = InstanceSnapshotCache()
+
 class CloudOpsUtils:
     """Common utilities for CloudOps operations"""
     
     def __init__(self, region='us-east-1'):
-        self.ec2 = boto3.client('ec2', region_name=region)
         self.region = region
     
-    def get_instances_by_tag(self, tag_key: str, tag_value: str, states: List[str] = None) -> List[Dict]:
+    @property
+    def ec2(self):
+        """EC2 client shared by every CloudOpsUtils in this container"""
+        return get_client('ec2', self.region)
+    
+    def get_instances_by_tag(self, tag_key: str, tag_value: str, states: List[str] = None,
+                             use_cache: bool = True) -> List[Dict]:
         """Get EC2 instances filtered by tag and optionally by state"""
+        if not use_cache:
+            return self._describe_instances_by_tag(tag_key, tag_value, states)
+        
+        key = (self.region, tag_key, tag_value, tuple(sorted(states or [])))
+        return snapshot_cache.get(
+            key, lambda: self._describe_instances_by_tag(tag_key, tag_value, states)
+        )
+    
+    def _describe_instances_by_tag(self, tag_key: str, tag_value: str, states: List[str] = None) -> List[Dict]:
+        """Page through describe_instances for a tag and optional states"""
         filters = [
             {'Name': f'tag:{tag_key}', 'Values': [tag_value]}
         ]
@@ -24,25 +154,31 @@ class CloudOpsUtils:
         if states:
             filters.append({'Name': 'instance-state-name', 'Values': states})
         
-        response = self.ec2.describe_instances(Filters=filters)
+        paginator = self.ec2.get_paginator('describe_instances')
+        pages = paginator.paginate(Filters=filters, PaginationConfig={'PageSize': 1000})
         
         instances = []
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instances.append({
-                    'InstanceId': instance['InstanceId'],
-                    'InstanceType': instance['InstanceType'],
-                    'State': instance['State']['Name'],
-                    'LaunchTime': instance['LaunchTime'].isoformat(),
-                    'PrivateIpAddress': instance.get('PrivateIpAddress', 'N/A'),
-                    'PublicIpAddress': instance.get('PublicIpAddress', 'N/A'),
-                    'Tags': instance.get('Tags', [])
-                })
+        for page in pages:
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    instances.append({
+                        'InstanceId': instance['InstanceId'],
+                        'InstanceType': instance['InstanceType'],
+                        'State': instance['State']['Name'],
+                        'LaunchTime': instance['LaunchTime'].isoformat(),
+                        'PrivateIpAddress': instance.get('PrivateIpAddress', 'N/A'),
+                        'PublicIpAddress': instance.get('PublicIpAddress', 'N/A'),
+                        'Platform': instance.get('PlatformDetails', 'Linux/UNIX'),
+                        'Tenancy': instance.get('Placement', {}).get('Tenancy', 'default'),
+                        'Tags': instance.get('Tags', [])
+                    })
         
         return instances
     
-    def bulk_instance_operation(self, instance_ids: List[str], operation: str) -> Dict[str, Any]:
-        """Perform bulk operations on instances"""
+    def bulk_instance_operation(self, instance_ids: List[str], operation: str,
+                                chunk_size: int = MAX_IDS_PER_CALL,
+                                max_workers: int = MAX_CONCURRENT_CALLS) -> Dict[str, Any]:
+        """Perform bulk operations on instances in concurrent chunks, reporting per instance"""
         if not instance_ids:
             return {
                 'success': False,
@@ -50,86 +186,114 @@ class CloudOpsUtils:
                 'affected_instances': []
             }
         
-        try:
-            if operation == 'start':
-                response = self.ec2.start_instances(InstanceIds=instance_ids)
-            elif operation == 'stop':
-                response = self.ec2.stop_instances(InstanceIds=instance_ids)
-            elif operation == 'reboot':
-                response = self.ec2.reboot_instances(InstanceIds=instance_ids)
-            else:
-                return {
-                    'success': False,
-                    'message': f'Invalid operation: {operation}',
-                    'affected_instances': []
-                }
-            
-            return {
-                'success': True,
-                'message': f'Successfully {operation}ed {len(instance_ids)} instances',
-                'operation': operation,
-                'affected_instances': instance_ids,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
+        if operation not in ('start', 'stop', 'reboot'):
             return {
                 'success': False,
-                'message': f'Error performing {operation}: {str(e)}',
+                'message': f'Invalid operation: {operation}',
                 'affected_instances': []
             }
-    
-    def get_resource_summary(self) -> Dict[str, Any]:
-        """Get summary of AWS resources in the region"""
+        
+        instance_ids = list(dict.fromkeys(instance_ids))
+        chunks = [instance_ids[i:i + chunk_size] for i in range(0, len(instance_ids), chunk_size)]
+        
+        results = {}
         try:
-            # Get all instances
-            instances_response = self.ec2.describe_instances()
-            
-            instance_summary = {
-                'total': 0,
-                'running': 0,
-                'stopped': 0,
-                'pending': 0,
-                'terminating': 0,
-                'by_type': {}
-            }
-            
-            for reservation in instances_response['Reservations']:
-                for instance in reservation['Instances']:
-                    instance_summary['total'] += 1
-                    state = instance['State']['Name']
-                    instance_type = instance['InstanceType']
-                    
-                    # Count by state
-                    if state in instance_summary:
-                        instance_summary[state] += 1
-                    
-                    # Count by type
-                    if instance_type not in instance_summary['by_type']:
-                        instance_summary['by_type'][instance_type] = 0
-                    instance_summary['by_type'][instance_type] += 1
-            
-            # Get VPCs
-            vpcs_response = self.ec2.describe_vpcs()
-            vpc_count = len(vpcs_response['Vpcs'])
-            
-            # Get Security Groups
-            sgs_response = self.ec2.describe_security_groups()
-            sg_count = len(sgs_response['SecurityGroups'])
-            
-            return {
-                'region': self.region,
-                'instances': instance_summary,
-                'vpcs': vpc_count,
-                'security_groups': sg_count,
-                'timestamp': datetime.now().isoformat()
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+                for chunk_results in executor.map(lambda chunk: self._run_chunk(chunk, operation), chunks):
+                    results.update(chunk_results)
+        finally:
+            # Instance states changed, so cached snapshots for this region are stale
+            snapshot_cache.invalidate(self.region)
+        
+        affected = [i for i in instance_ids if results[i]['status'] == 'success']
+        failed = [i for i in instance_ids if results[i]['status'] == 'error']
+        
+        message = f'Successfully {operation}ed {len(affected)} of {len(instance_ids)} instances'
+        if failed:
+            message += f' ({len(failed)} failed)'
+        
+        return {
+            'success': not failed,
+            'message': message,
+            'operation': operation,
+            'affected_instances': affected,
+            'failed_instances': failed,
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _run_chunk(self, instance_ids: List[str], operation: str) -> Dict[str, Dict[str, Any]]:
+        """Run one operation call with throttling backoff, bisecting the chunk on per-instance errors"""
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            try:
+                return self._call_operation(instance_ids, operation)
+            except Exception as e:
+                code = error_code(e)
+                if code in THROTTLING_ERRORS and attempt < MAX_THROTTLE_RETRIES:
+                    time.sleep(random.uniform(0, min(20, 0.5 * 2 ** attempt)))
+                    continue
+                if is_instance_error(code) and len(instance_ids) > 1:
+                    # One bad id fails the whole call, so split to isolate it
+                    middle = len(instance_ids) // 2
+                    results = self._run_chunk(instance_ids[:middle], operation)
+                    results.update(self._run_chunk(instance_ids[middle:], operation))
+                    return results
+                return {i: {'status': 'error', 'error': str(e)} for i in instance_ids}
+    
+    def _call_operation(self, instance_ids: List[str], operation: str) -> Dict[str, Dict[str, Any]]:
+        """Issue a single start/stop/reboot call and map the response to per-instance results"""
+        if operation == 'reboot':
+            self.ec2.reboot_instances(InstanceIds=instance_ids)
+            return {i: {'status': 'success'} for i in instance_ids}
+        
+        if operation == 'start':
+            changes = self.ec2.start_instances(InstanceIds=instance_ids)['StartingInstances']
+        else:
+            changes = self.ec2.stop_instances(InstanceIds=instance_ids)['StoppingInstances']
+        
+        results = {i: {'status': 'success'} for i in instance_ids}
+        for change in changes:
+            results[change['InstanceId']] = {
+                'status': 'success',
+                'previous_state': change['PreviousState']['Name'],
+                'current_state': change['CurrentState']['Name']
             }
-            
+        return results
+    
+    def get_resource_summary(self, regions: List[str] = None) -> Dict[str, Any]:
+        """Get summary of AWS resources in one or more regions"""
+        regions = list(dict.fromkeys(regions or [self.region]))
+        
+        try:
+            # Every (region, describe family) pair is paged through in parallel
+            jobs = [(region, family) for region in regions for family in SUMMARY_FAMILIES]
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CALLS, len(jobs))) as executor:
+                counts = list(executor.map(lambda job: SUMMARY_FAMILIES[job[1]](get_client('ec2', job[0])), jobs))
         except Exception as e:
             return {
                 'error': f'Failed to get resource summary: {str(e)}',
                 'timestamp': datetime.now().isoformat()
             }
+        
+        timestamp = datetime.now().isoformat()
+        summaries = {region: {'region': region, 'timestamp': timestamp} for region in regions}
+        for (region, family), count in zip(jobs, counts):
+            summaries[region][family] = count
+        
+        if len(regions) == 1:
+            return summaries[regions[0]]
+        
+        totals = {'instances': _new_instance_summary(), 'vpcs': 0, 'security_groups': 0}
+        for summary in summaries.values():
+            _merge_instance_summary(totals['instances'], summary['instances'])
+            totals['vpcs'] += summary['vpcs']
+            totals['security_groups'] += summary['security_groups']
+        
+        return {
+            'regions': summaries,
+            'totals': totals,
+            'timestamp': timestamp
+        }
     
     def format_response(self, status_code: int, data: Any, message: str = None) -> Dict[str, Any]:
         """Format standardized Lambda response"""
@@ -163,4 +327,55 @@ def validate_instance_ids(instance_ids: List[str]) -> bool:
         if not instance_id.startswith('i-') or len(instance_id) != 19:
             return False
     
-    return True
\ No newline at end of file
+    return True
+
+def _new_instance_summary() -> Dict[str, Any]:
+    """Empty instance counters used by the resource summary"""
+    return {
+        'total': 0,
+        'running': 0,
+        'stopped': 0,
+        'pending': 0,
+        'terminating': 0,
+        'by_type': {}
+    }
+
+def _merge_instance_summary(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """Add the counters of one instance summary into another"""
+    for key in ('total', 'running', 'stopped', 'pending', 'terminating'):
+        target[key] += source[key]
+    for instance_type, count in source['by_type'].items():
+        target['by_type'][instance_type] = target['by_type'].get(instance_type, 0) + count
+
+def _count_instances(ec2) -> Dict[str, Any]:
+    """Count instances by state and type across all pages, keeping only counters"""
+    summary = _new_instance_summary()
+    by_type = summary['by_type']
+    pages = ec2.get_paginator('describe_instances').paginate(PaginationConfig={'PageSize': 1000})
+    for page in pages:
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                summary['total'] += 1
+                state = instance['State']['Name']
+                if state in summary:
+                    summary[state] += 1
+                instance_type = instance['InstanceType']
+                by_type[instance_type] = by_type.get(instance_type, 0) + 1
+    return summary
+
+def _count_vpcs(ec2) -> int:
+    """Count VPCs across all pages"""
+    pages = ec2.get_paginator('describe_vpcs').paginate(PaginationConfig={'PageSize': 1000})
+    return sum(len(page['Vpcs']) for page in pages)
+
+def _count_security_groups(ec2) -> int:
+    """Count security groups across all pages"""
+    pages = ec2.get_paginator('describe_security_groups').paginate(PaginationConfig={'PageSize': 1000})
+    return sum(len(page['SecurityGroups']) for page in pages)
+
+# Describe families counted by get_resource_summary, keyed by summary field
+SUMMARY_FAMILIES = {
+    'instances': _count_instances,
+    'vpcs': _count_vpcs,
+    'security_groups': _count_security_groups
+}
@@ -15,8 +15,15 @@ provider "aws" {
 resource "null_resource" "create_layer" {
   provisioner "local-exec" {
     command = <<-EOT
-      mkdir -p layer/python/lib/python3.9/site-packages
+      mkdir -p layer/python/lib/python3.9/site-packages layer/pricing
       pip install requests boto3 -t layer/python/lib/python3.9/site-packages/
+      cp layer_utils.py pricing_catalog.py chunk_reader.py ../aws_clients.py layer/python/
+      # Pricing catalog, mapped from /opt/pricing/ec2-prices.bin at runtime
+      for region in ${join(" ", var.pricing_regions)}; do
+        curl -sSf -o "pricing-$region.csv" "https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonEC2/current/$region/index.csv"
+      done
+      python3 pricing_catalog.py pricing-*.csv layer/pricing/ec2-prices.bin
+      rm -f pricing-*.csv
       cd layer && zip -r ../cloudops-layer.zip .
     EOT
   }
@@ -98,12 +105,23 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Effect = "Allow"
         Action = [
           "ec2:DescribeInstances",
+          "ec2:DescribeVpcs",
+          "ec2:DescribeSecurityGroups",
           "ec2:StartInstances",
           "ec2:StopInstances",
+          "ec2:RebootInstances",
           "ec2:DescribeRegions",
           "ec2:DescribeAvailabilityZones"
         ]
         Resource = "*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:AbortMultipartUpload"
+        ]
+        Resource = "arn:aws:s3:::${var.report_bucket}/reports/*"
       }
     ]
   })
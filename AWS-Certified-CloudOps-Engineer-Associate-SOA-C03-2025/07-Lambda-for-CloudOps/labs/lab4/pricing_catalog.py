@@ -0,0 +1,228 @@
+"""
+EC2 On-Demand pricing catalog for CloudOps cost reports
+This file will be packaged in the Lambda Layer
+
+The catalog is a compact binary file of fixed-width records sorted by
+"region|instance_type|os|tenancy", memory-mapped and binary-searched so the
+full price list never has to be parsed on the request path. The layer build
+in main.tf generates it from the per-region AWS price list CSVs:
+
+    python pricing_catalog.py us-east-1.csv eu-west-1.csv ec2-prices.bin
+"""
+
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Tuple
+
+MAGIC = b'EC2PRC02'
+HEADER = struct.Struct('<8sIH2x')
+KEY_WIDTH = 64
+RECORD = struct.Struct(f'<{KEY_WIDTH}sd')
+HOURS_PER_MONTH = 24 * 30
+DEFAULT_HOURLY_RATE = 0.05
+
+# Bundled catalog in the layer (/opt) first, then a copy cached from a previous download
+CATALOG_PATHS = [
+    os.environ.get('PRICING_CATALOG_PATH', '/opt/pricing/ec2-prices.bin'),
+    '/tmp/pricing/ec2-prices.bin'
+]
+
+# Used only when no catalog file is available, and only for Linux on shared tenancy (us-east-1 rates)
+FALLBACK_RATES = {
+    't3.micro': 0.0104,
+    't3.small': 0.0208,
+    't3.medium': 0.0416,
+    't3.large': 0.0832,
+    't3.xlarge': 0.1664,
+    't3.2xlarge': 0.3328,
+    'm5.large': 0.096,
+    'm5.xlarge': 0.192,
+    'm5.2xlarge': 0.384,
+    'c5.large': 0.085,
+    'c5.xlarge': 0.17
+}
+
+# EC2 PlatformDetails / Placement.Tenancy values mapped to price list terms; any other
+# platform (SQL Server editions, RHEL with HA, other BYOL variants) is reported as unpriced
+PLATFORM_TO_OS = {
+    'Linux/UNIX': 'Linux',
+    'Windows': 'Windows',
+    'Windows BYOL': 'Windows BYOL',
+    'Red Hat Enterprise Linux': 'RHEL',
+    'SUSE Linux': 'SUSE',
+    'Ubuntu Pro': 'Ubuntu Pro'
+}
+TENANCY_TO_PRICE_TERM = {
+    'default': 'Shared',
+    'dedicated': 'Dedicated',
+    'host': 'Host'
+}
+
+def make_key(region: str, instance_type: str, operating_system: str = 'Linux', tenancy: str = 'Shared') -> bytes:
+    """Encode a catalog key as a fixed-width record prefix"""
+    key = f'{region}|{instance_type}|{operating_system}|{tenancy}'.encode()
+    if len(key) > KEY_WIDTH:
+        raise ValueError(f'Pricing key too long: {key!r}')
+    return key.ljust(KEY_WIDTH, b'\0')
+
+class PricingCatalog:
+    """Read-only view over a memory-mapped pricing catalog file"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._mmap = None
+        self._count = 0
+        self._memo = {}
+
+        if path:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self._count, key_width = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or key_width != KEY_WIDTH:
+                raise ValueError(f'Not a pricing catalog: {path}')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key_at(self, index: int) -> bytes:
+        offset = HEADER.size + index * RECORD.size
+        return self._mmap[offset:offset + KEY_WIDTH]
+
+    def hourly_rate(self, region: str, instance_type: str,
+                    operating_system: str = 'Linux', tenancy: str = 'Shared'):
+        """Return the On-Demand hourly rate, or None if the catalog has no entry"""
+        key = make_key(region, instance_type, operating_system, tenancy)
+        if key in self._memo:
+            return self._memo[key]
+
+        rate = None
+        if self._mmap is not None:
+            index = bisect_left(_KeyView(self), key)
+            if index < self._count and self._key_at(index) == key:
+                rate = RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size)[1]
+
+        self._memo[key] = rate
+        return rate
+
+    def price_instances(self, region: str, instances: List[Dict]) -> Dict[str, Any]:
+        """Price every instance in one pass, resolving each distinct key only once"""
+        rates = []
+        running = []
+        unpriced = 0
+        for instance in instances:
+            operating_system = PLATFORM_TO_OS.get(instance.get('Platform', 'Linux/UNIX'))
+            tenancy = TENANCY_TO_PRICE_TERM.get(instance.get('Tenancy'), 'Shared')
+            if operating_system is None:
+                rate = None
+            elif self._mmap is not None:
+                rate = self.hourly_rate(region, instance['InstanceType'], operating_system, tenancy)
+            elif operating_system == 'Linux' and tenancy == 'Shared':
+                rate = FALLBACK_RATES.get(instance['InstanceType'])
+            else:
+                rate = None
+            if rate is None:
+                rate = DEFAULT_HOURLY_RATE
+                unpriced += 1
+            rates.append(rate)
+            running.append(instance['State'] == 'running')
+
+        total_hourly = sum(rates)
+        running_hourly = sum(rate for rate, is_running in zip(rates, running) if is_running)
+
+        return {
+            'rates': rates,
+            'total_hourly_cost': total_hourly,
+            'running_hourly_cost': running_hourly,
+            'unpriced_instances': unpriced
+        }
+
+class _KeyView:
+    """Sequence of record keys so bisect can search the mapped file directly"""
+
+    def __init__(self, catalog: PricingCatalog):
+        self.catalog = catalog
+
+    def __len__(self) -> int:
+        return self.catalog._count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.catalog._key_at(index)
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> PricingCatalog:
+    """Load the pricing catalog once per container"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = None
+                for path in CATALOG_PATHS:
+                    if os.path.exists(path):
+                        try:
+                            catalog = PricingCatalog(path)
+                            break
+                        except (OSError, ValueError) as e:
+                            print(f"Skipping pricing catalog {path}: {str(e)}")
+                _catalog = catalog or PricingCatalog()
+    return _catalog
+
+def write_catalog(entries: Iterable[Tuple[str, str, str, str, float]], output_path: str) -> int:
+    """Write (region, instance_type, os, tenancy, hourly_rate) entries as a catalog file"""
+    records = {}
+    for region, instance_type, operating_system, tenancy, rate in entries:
+        records[make_key(region, instance_type, operating_system, tenancy)] = rate
+
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), KEY_WIDTH))
+        for key in sorted(records):
+            f.write(RECORD.pack(key, records[key]))
+    os.replace(tmp_path, output_path)
+    return len(records)
+
+def read_price_list_csv(path: str):
+    """Stream On-Demand shared/dedicated/host rates from the AWS EC2 price list CSV
+
+    Bring-your-own-license rows are kept under their own OS term (e.g. "Windows BYOL"),
+    since they carry a different rate from the License Included rows.
+    """
+    with open(path, newline='') as f:
+        # The offer file starts with a few metadata lines before the header row
+        for line in f:
+            if line.startswith('"SKU"'):
+                header = next(csv.reader([line]))
+                break
+        else:
+            return
+
+        for row in csv.DictReader(f, fieldnames=header):
+            if (row.get('TermType') != 'OnDemand' or row.get('Unit') != 'Hrs'
+                    or row.get('CapacityStatus') != 'Used'
+                    or row.get('Pre Installed S/W') != 'NA'):
+                continue
+            try:
+                rate = float(row['PricePerUnit'])
+            except (KeyError, ValueError):
+                continue
+            operating_system = row['Operating System']
+            if row.get('License Model') == 'Bring your own license':
+                operating_system = f'{operating_system} BYOL'
+            yield row['Region Code'], row['Instance Type'], operating_system, row['Tenancy'], rate
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python pricing_catalog.py <price-list.csv> [<price-list.csv> ...] <output.bin>")
+        sys.exit(1)
+    inputs, output = sys.argv[1:-1], sys.argv[-1]
+    count = write_catalog((entry for path in inputs for entry in read_price_list_csv(path)), output)
+    if not count:
+        print(f"No On-Demand prices found in {', '.join(inputs)}")
+        sys.exit(1)
+    print(f"Wrote {count} prices to {output}")
@@ -4,6 +4,18 @@ variable "aws_region" {
   default     = "us-east-1"
 }
 
+variable "pricing_regions" {
+  description = "Regions whose EC2 On-Demand prices are bundled into the layer's pricing catalog"
+  type        = list(string)
+  default     = ["us-east-1"]
+}
+
+variable "report_bucket" {
+  description = "S3 bucket the resource reporter may write detailed reports to (under reports/)"
+  type        = string
+  default     = "my-cloudops-reports"
+}
+
 variable "environment" {
   description = "Environment name"
   type        = string
@@ -1,22 +1,209 @@
+import csv
+import io
 import json
+import os
+import time
 import boto3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
+
+s3 = boto3.client('s3')
+
+# Objects are read in ranged GETs and written back in multipart parts of these sizes,
+# so memory stays bounded by a few chunks no matter how large the object is
+CHUNK_SIZE = int(os.environ.get('CHUNK_SIZE', str(8 * 1024 * 1024)))
+PART_SIZE = max(int(os.environ.get('PART_SIZE', str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))
+# A longer line fails the object instead of growing the buffer without bound
+MAX_LINE_BYTES = int(os.environ.get('MAX_LINE_BYTES', str(16 * 1024 * 1024)))
+
+OUTPUT_BUCKET = os.environ.get('OUTPUT_BUCKET')  # defaults to the source bucket
+OUTPUT_PREFIX = os.environ.get('OUTPUT_PREFIX', 'processed/')
+PIPELINE = os.environ.get('PIPELINE', 'strip,drop_empty')
+TEXT_SUFFIXES = tuple(os.environ.get('TEXT_SUFFIXES', '.txt,.log,.csv,.json,.ndjson,.jsonl').split(','))
+
+# Transform name -> generator function taking and yielding lines (str, without newline)
+TRANSFORMS = {}
+
+def transform(name):
+    """Register a line/record transform for use in PIPELINE"""
+    def register(func):
+        TRANSFORMS[name] = func
+        return func
+    return register
+
+@transform('strip')
+def strip_lines(lines):
+    for line in lines:
+        yield line.strip()
+
+@transform('drop_empty')
+def drop_empty(lines):
+    for line in lines:
+        if line:
+            yield line
+
+@transform('dedupe_adjacent')
+def dedupe_adjacent(lines):
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+        previous = line
+
+@transform('csv_to_ndjson')
+def csv_to_ndjson(lines):
+    """First line is the header; every following row becomes one JSON object"""
+    rows = csv.reader(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), separators=(',', ':'))
+
+def build_pipeline(spec=PIPELINE):
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Unknown transforms: {unknown}")
+    return [TRANSFORMS[name] for name in names]
+
+def iter_chunks(bucket, key, size, etag, chunk_size=CHUNK_SIZE):
+    """Ranged GetObject reads; IfMatch fails the read if the object changes underneath us"""
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size) - 1
+        response = s3.get_object(Bucket=bucket, Key=key, Range=f'bytes={start}-{end}', IfMatch=etag)
+        yield response['Body'].read()
+
+def iter_lines(chunks, max_line_bytes=MAX_LINE_BYTES):
+    """Split byte chunks into decoded lines, carrying partial lines across chunk boundaries"""
+    # Only the new chunk is searched for newlines; the buffer holds just the current partial line
+    pending = bytearray()
+    for chunk in chunks:
+        start = 0
+        end = chunk.find(b'\n')
+        while end != -1:
+            if pending:
+                pending += memoryview(chunk)[start:end]
+                line = bytes(pending)
+                pending.clear()
+            else:
+                line = chunk[start:end]
+            yield line.rstrip(b'\r').decode('utf-8', errors='replace')
+            start = end + 1
+            end = chunk.find(b'\n', start)
+        pending += memoryview(chunk)[start:]
+        if len(pending) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes; is this a text object?")
+    if pending:
+        yield bytes(pending).rstrip(b'\r').decode('utf-8', errors='replace')
+
+class MultipartWriter:
+    """Buffer output and upload it in PART_SIZE parts; small outputs become a single PutObject"""
+
+    def __init__(self, bucket, key, part_size=PART_SIZE):
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = io.BytesIO()
+        self.upload_id = None
+        self.parts = []
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.bytes_written += len(data)
+        if self.buffer.tell() >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = s3.create_multipart_upload(Bucket=self.bucket, Key=self.key)['UploadId']
+        number = len(self.parts) + 1
+        response = s3.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                  PartNumber=number, Body=self.buffer.getvalue())
+        self.parts.append({'PartNumber': number, 'ETag': response['ETag']})
+        self.buffer = io.BytesIO()
+
+    def close(self):
+        if self.upload_id is None:
+            s3.put_object(Bucket=self.bucket, Key=self.key, Body=self.buffer.getvalue())
+            return
+        if self.buffer.tell():
+            self._upload_part()
+        s3.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                     MultipartUpload={'Parts': self.parts})
+
+    def abort(self):
+        if self.upload_id is not None:
+            s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+def process_object(bucket, key, pipeline):
+    """Stream one object through the pipeline into OUTPUT_PREFIX + key"""
+    head = s3.head_object(Bucket=bucket, Key=key)
+    output_bucket = OUTPUT_BUCKET or bucket
+    output_key = OUTPUT_PREFIX + key
+
+    lines = iter_lines(iter_chunks(bucket, key, head['ContentLength'], head['ETag']))
+    for stage in pipeline:
+        lines = stage(lines)
+
+    writer = MultipartWriter(output_bucket, output_key)
+    count = 0
+    try:
+        for line in lines:
+            writer.write(line.encode() + b'\n')
+            count += 1
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+    return {
+        'output': f's3://{output_bucket}/{output_key}',
+        'input_bytes': head['ContentLength'],
+        'output_bytes': writer.bytes_written,
+        'lines': count,
+        'parts': len(writer.parts)
+    }
+
+def process_record(record, pipeline):
+    bucket = record['s3']['bucket']['name']
+    # Keys in S3 notifications are URL-encoded
+    key = unquote_plus(record['s3']['object']['key'])
+    started = time.time()
+    result = {'event': record['eventName'], 'bucket': bucket, 'key': key}
+
+    if key.startswith(OUTPUT_PREFIX) and (OUTPUT_BUCKET or bucket) == bucket:
+        # Our own output; processing it would loop
+        result.update(status='skipped', reason='output object')
+    elif not key.lower().endswith(TEXT_SUFFIXES):
+        result.update(status='skipped', reason='no pipeline for this object type')
+    else:
+        try:
+            result.update(process_object(bucket, key, pipeline), status='processed')
+        except Exception as e:
+            result.update(status='failed', error=str(e))
+    result['seconds'] = round(time.time() - started, 3)
+    print(json.dumps(result))
+    return result
 
 def lambda_handler(event, context):
-    print("S3 Event received:")
-    print(json.dumps(event, indent=2))
-    
-    for record in event['Records']:
-        bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
-        event_name = record['eventName']
-        
-        print(f"Event: {event_name}")
-        print(f"Bucket: {bucket}")
-        print(f"Object: {key}")
-        
-        # Process the event (e.g., resize image, process data, etc.)
-        
+    # Deletes, restores, replication and lifecycle events have no new object to process
+    records = [record for record in event.get('Records', [])
+               if record.get('eventName', '').startswith('ObjectCreated:')]
+    print(f"S3 Event received: {len(records)} ObjectCreated record(s)")
+
+    pipeline = build_pipeline()
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(records)))) as executor:
+        results = list(executor.map(lambda record: process_record(record, pipeline), records))
+
+    failed = [result for result in results if result['status'] == 'failed']
+    if failed:
+        # Raise so the asynchronous S3 invocation is retried; outputs are overwritten, not duplicated
+        raise RuntimeError(f"{len(failed)} of {len(results)} objects failed: {[r['key'] for r in failed]}")
+
     return {
         'statusCode': 200,
-        'body': json.dumps('Event processed successfully')
-    }
\ No newline at end of file
+        'body': json.dumps({'message': 'Event processed successfully', 'results': results})
+    }
@@ -29,7 +29,10 @@ aws lambda create-function \
   --runtime python3.9 \
   --role arn:aws:iam::$ACCOUNT_ID:role/lambda-execution-role \
   --handler lambda-s3-processor.lambda_handler \
-  --zip-file fileb://lambda-function.zip
+  --zip-file fileb://lambda-function.zip \
+  --timeout 900 \
+  --memory-size 512 \
+  --environment '{"Variables": {"PIPELINE": "strip,drop_empty", "OUTPUT_PREFIX": "processed/"}}'
 
 # Step 4: Add S3 permission to Lambda
 echo "Adding S3 permission to Lambda..."
@@ -1,22 +1,74 @@
 from flask import Flask, jsonify
+import json
 import os
+import signal
 import socket
+import sys
+import urllib.request
 from datetime import datetime
 
 app = Flask(__name__)
 
-@app.route('/')
-def home():
-    return jsonify({
+# Fargate injects this into every container; outside ECS a stub stands in for it
+METADATA_URI = os.environ.get('ECS_CONTAINER_METADATA_URI_V4')
+METADATA_STUB = os.environ.get('ECS_METADATA_STUB')  # optional path to a JSON file
+METADATA_TIMEOUT = float(os.environ.get('ECS_METADATA_TIMEOUT', '1'))
+
+LOCAL_TASK_METADATA = {
+    'Cluster': 'local',
+    'TaskARN': 'local',
+    'Family': 'my-ecs-app',
+    'Revision': '0',
+    'AvailabilityZone': 'local',
+    'LaunchType': 'LOCAL'
+}
+
+def load_task_metadata():
+    """ECS task metadata (v4 endpoint), the stub file, or LOCAL_TASK_METADATA"""
+    if METADATA_URI:
+        try:
+            with urllib.request.urlopen(f'{METADATA_URI}/task', timeout=METADATA_TIMEOUT) as response:
+                return json.load(response)
+        except Exception as e:
+            print(f"Error reading task metadata: {str(e)}")
+    if METADATA_STUB:
+        with open(METADATA_STUB) as f:
+            return json.load(f)
+    return LOCAL_TASK_METADATA
+
+def describe_instance():
+    """Everything in the / response that does not change for the life of the process"""
+    task = load_task_metadata()
+    return {
         'message': 'Hello from ECS Fargate!',
         'hostname': socket.gethostname(),
-        'timestamp': datetime.now().isoformat(),
-        'version': os.environ.get('APP_VERSION', '1.0')
-    })
+        'version': os.environ.get('APP_VERSION', '1.0'),
+        'task': {
+            'cluster': task.get('Cluster'),
+            'taskArn': task.get('TaskARN'),
+            'family': task.get('Family'),
+            'revision': task.get('Revision'),
+            'availabilityZone': task.get('AvailabilityZone'),
+            'launchType': task.get('LaunchType')
+        }
+    }
+
+# Resolved once at import; with gunicorn's preload_app this runs in the master before workers fork
+INSTANCE = describe_instance()
+
+@app.route('/')
+def home():
+    return jsonify(dict(INSTANCE, timestamp=datetime.now().isoformat()))
 
 @app.route('/health')
 def health():
     return jsonify({'status': 'healthy'})
 
+def stop(signum, frame):
+    print("SIGTERM received, shutting down")
+    sys.exit(0)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; the container runs gunicorn (see gunicorn.conf.py)
+    signal.signal(signal.SIGTERM, stop)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', '5000')))
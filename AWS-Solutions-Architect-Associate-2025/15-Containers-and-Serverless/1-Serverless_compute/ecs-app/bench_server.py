@@ -0,0 +1,96 @@
+"""
+Throughput benchmark: Flask dev server vs gunicorn (gunicorn.conf.py)
+
+    pip install -r requirements.txt
+    python bench_server.py [seconds] [concurrency] [path]
+
+Starts each server on a local port, drives it with `concurrency` keep-alive
+clients for `seconds`, and prints requests/s and latency percentiles.
+Run it inside the container (or with --cpus set on docker run) to see the
+numbers the Fargate task size would give.
+"""
+
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = {
+    'flask-dev': ([sys.executable, 'app.py'], 5101),
+    'gunicorn': ([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'], 5102)
+}
+
+def wait_ready(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def client(port, path, stop_at, latencies):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            # The dev server closes keep-alive connections; reconnect
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+def run(name, seconds, concurrency, path):
+    command, port = SERVERS[name]
+    env = dict(os.environ, PORT=str(port))
+    server = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        latencies = []
+        stop_at = time.time() + seconds
+        threads = [threading.Thread(target=client, args=(port, path, stop_at, latencies)) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        # Same signal ECS sends; both servers should exit cleanly
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies.sort()
+    count = len(latencies)
+    percentile = lambda p: latencies[min(count - 1, int(count * p))] * 1000 if count else 0.0
+    return {
+        'requests': count,
+        'rps': count / seconds,
+        'p50_ms': percentile(0.50),
+        'p99_ms': percentile(0.99),
+        'exit_code': server.returncode
+    }
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    path = sys.argv[3] if len(sys.argv) > 3 else '/'
+
+    print(f"GET {path}, {concurrency} clients, {seconds:g}s per server")
+    results = {name: run(name, seconds, concurrency, path) for name in SERVERS}
+    baseline = results['flask-dev']['rps'] or 1
+    for name, r in results.items():
+        print(f"{name:10} {r['rps']:9.0f} req/s  p50 {r['p50_ms']:6.2f}ms  p99 {r['p99_ms']:7.2f}ms  "
+              f"({r['rps'] / baseline:.1f}x, exit {r['exit_code']})")
+
+if __name__ == '__main__':
+    main()
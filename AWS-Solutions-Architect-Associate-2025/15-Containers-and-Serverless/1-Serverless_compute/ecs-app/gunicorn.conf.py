@@ -0,0 +1,92 @@
+"""
+Gunicorn settings for the ECS task
+
+    gunicorn --config gunicorn.conf.py app:app
+
+Fargate bills by vCPU, so the server is sized from the CPU the task actually
+gets, not the host's core count. The task-level "cpu" (e.g. "256" = 0.25 vCPU)
+is not a cgroup quota on the container, so it is read from Limits.CPU in the
+ECS task metadata; the cgroup quota and the visible CPUs are fallbacks.
+
+Workers are always gthread: an idle ALB keep-alive connection waits in the
+worker's poller instead of holding a process, which sync workers cannot do.
+
+    - under 2 vCPUs: one process with 8 threads; extra processes would only
+      compete for the same fraction of a core
+    - 2 vCPUs or more: 2 x vCPUs + 1 processes with 4 threads each
+
+WEB_WORKERS, WEB_THREADS and WEB_WORKER_CLASS override the choice.
+"""
+
+import json
+import math
+import os
+import urllib.request
+
+METADATA_URI = os.environ.get('ECS_CONTAINER_METADATA_URI_V4')
+
+def task_cpus():
+    """Task-level vCPUs from the ECS task metadata (Limits.CPU), or None outside ECS"""
+    if not METADATA_URI:
+        return None
+    try:
+        with urllib.request.urlopen(f'{METADATA_URI}/task', timeout=1) as response:
+            cpu = json.load(response).get('Limits', {}).get('CPU')
+    except Exception as e:
+        print(f"Error reading task metadata: {str(e)}")
+        return None
+    return max(float(cpu), 0.125) if cpu else None
+
+def effective_cpus():
+    """vCPUs available to this container: task limit, cgroup quota, else the CPUs we may run on"""
+    cpus = task_cpus()
+    if cpus:
+        return cpus
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(int(quota) / int(period), 0.125)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return max(quota / period, 0.125)
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+cpus = effective_cpus()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+if cpus < 2:
+    workers = int(os.environ.get('WEB_WORKERS', '1'))
+    threads = int(os.environ.get('WEB_THREADS', '8'))
+else:
+    workers = int(os.environ.get('WEB_WORKERS', str(2 * math.floor(cpus) + 1)))
+    threads = int(os.environ.get('WEB_THREADS', '4'))
+
+# Load the app (and resolve host/task metadata) once in the master, then fork
+preload_app = True
+
+# ECS sends SIGTERM and waits stopTimeout (30s by default) before SIGKILL;
+# gunicorn stops accepting and lets in-flight requests finish within this window
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '25'))
+timeout = 30
+# Longer than the ALB idle timeout (60s), so the ALB closes idle connections first and never
+# reuses one the server has just closed (which would surface as a 502)
+keepalive = int(os.environ.get('KEEPALIVE', '75'))
+
+accesslog = '-' if os.environ.get('ACCESS_LOG') == 'true' else None
+errorlog = '-'
+
+def on_starting(server):
+    server.log.info(f"{cpus:g} vCPU(s): {workers} {worker_class} worker(s) x {threads} thread(s)")
@@ -1,52 +1,347 @@
 import json
-import boto3
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import unquote, unquote_plus
+
+# Records from one batch are processed concurrently on at most this many threads
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '8'))
+
+# CORS headers are built once per container and attached to every API response
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': os.environ.get('CORS_ORIGIN', '*'),
+    'Access-Control-Allow-Methods': os.environ.get('CORS_METHODS', 'GET,POST,PUT,PATCH,DELETE,OPTIONS'),
+    'Access-Control-Allow-Headers': os.environ.get('CORS_HEADERS', 'Content-Type,Authorization,X-Request-Id')
+}
 
 def lambda_handler(event, context):
-    # Determine event source
-    event_source = 'unknown'
-    
-    if 'httpMethod' in event:
-        event_source = 'api-gateway'
-        return handle_api_request(event, context)
-    elif 'Records' in event:
-        if event['Records'][0].get('eventSource') == 'aws:s3':
-            event_source = 's3'
-            return handle_s3_event(event, context)
-    
+    # Determine event source: the first top-level key that identifies a known event shape
+    for key, handler in EVENT_SOURCES:
+        if key in event:
+            return handler(event, context)
+
     return {
         'statusCode': 200,
         'body': json.dumps({
-            'message': f'Event processed from {event_source}',
+            'message': 'Event processed from unknown',
             'timestamp': datetime.now().isoformat()
         })
     }
 
+class Request:
+    """Normalized view of an API Gateway REST (v1) or HTTP API (v2) proxy event"""
+
+    __slots__ = ('method', 'path', 'params', 'allowed', 'query', 'headers', 'body', 'event', 'context')
+
+    def __init__(self, event, context):
+        http = (event.get('requestContext') or {}).get('http')
+        if http:
+            self.method = http['method']
+            self.path = event.get('rawPath') or '/'
+        else:
+            self.method = event['httpMethod']
+            self.path = event.get('path') or '/'
+        self.params = {}
+        self.allowed = ()
+        self.query = event.get('queryStringParameters') or {}
+        self.headers = event.get('headers') or {}
+        self.body = event.get('body')
+        self.event = event
+        self.context = context
+
+    @property
+    def request_id(self):
+        return getattr(self.context, 'aws_request_id', None) or \
+            (self.event.get('requestContext') or {}).get('requestId')
+
+def respond(status_code, body, headers=None):
+    response_headers = {'Content-Type': 'application/json'}
+    if headers:
+        response_headers.update(headers)
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': json.dumps(body)
+    }
+
+# Middleware wraps a handler(request) -> response; the chain is applied once, when a route is registered
+def timing_middleware(handler):
+    def timed(request):
+        started = time.perf_counter()
+        response = handler(request)
+        elapsed = (time.perf_counter() - started) * 1000
+        response['headers']['Server-Timing'] = f'app;dur={elapsed:.3f}'
+        print(f"{request.method} {request.path} -> {response['statusCode']} in {elapsed:.3f}ms")
+        return response
+    return timed
+
+def request_id_middleware(handler):
+    def with_request_id(request):
+        response = handler(request)
+        if request.request_id:
+            response['headers']['X-Request-Id'] = request.request_id
+        return response
+    return with_request_id
+
+def cors_middleware(handler):
+    def with_cors(request):
+        response = handler(request)
+        response['headers'].update(CORS_HEADERS)
+        return response
+    return with_cors
+
+# Outermost first
+MIDDLEWARE = [timing_middleware, request_id_middleware, cors_middleware]
+
+def apply_middleware(handler):
+    for middleware in reversed(MIDDLEWARE):
+        handler = middleware(handler)
+    return handler
+
+class RouteNode:
+    """One path segment of the parametrized route trie"""
+
+    __slots__ = ('children', 'param', 'param_name', 'methods')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.param_name = None
+        self.methods = {}
+
+# Paths without parameters resolve with one dict lookup; parametrized paths walk the trie segment by segment
+# (falling back to the {param} branch when a literal branch dead-ends), so lookup cost depends on path depth
+# and route shape, not on how many routes are registered
+STATIC_ROUTES = {}
+ROUTE_TRIE = RouteNode()
+
+def split_path(path):
+    return [segment for segment in path.split('/') if segment]
+
+def route(method, path):
+    """Register a handler(request) for METHOD (or 'ANY') and a path like /items/{id}"""
+    def register(func):
+        handler = apply_middleware(func)
+        segments = split_path(path)
+        if not any(segment.startswith('{') for segment in segments):
+            STATIC_ROUTES.setdefault('/' + '/'.join(segments), {})[method] = handler
+            return func
+        node = ROUTE_TRIE
+        for segment in segments:
+            if segment.startswith('{') and segment.endswith('}'):
+                name = segment[1:-1]
+                if node.param is None:
+                    node.param = RouteNode()
+                    node.param_name = name
+                elif node.param_name != name:
+                    raise ValueError(f'Conflicting parameter {segment} in {path} (already {{{node.param_name}}})')
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, RouteNode())
+        node.methods[method] = handler
+        return func
+    return register
+
+def match_route(node, segments, index, params):
+    """Trie node matching segments[index:], trying the literal branch before the {param} branch"""
+    if index == len(segments):
+        return node if node.methods else None
+    segment = segments[index]
+    child = node.children.get(segment)
+    if child is not None:
+        found = match_route(child, segments, index + 1, params)
+        if found is not None:
+            return found
+    if node.param is not None:
+        params[node.param_name] = unquote(segment)
+        found = match_route(node.param, segments, index + 1, params)
+        if found is not None:
+            return found
+        del params[node.param_name]
+    return None
+
+def resolve(path):
+    """(methods, params) for a request path, or (None, None) when no route matches"""
+    normalized = path.rstrip('/') or '/'
+    methods = STATIC_ROUTES.get(normalized)
+    if methods is not None:
+        return methods, {}
+
+    params = {}
+    node = match_route(ROUTE_TRIE, split_path(path), 0, params)
+    if node is None:
+        return None, None
+    return node.methods, params
+
+def not_found(request):
+    return respond(404, {'error': f'No route for {request.path}'})
+
+def method_not_allowed(request):
+    return respond(405, {'error': f'{request.method} not allowed on {request.path}'},
+                   {'Allow': ','.join(request.allowed)})
+
+def preflight(request):
+    return {'statusCode': 204, 'headers': {}, 'body': ''}
+
+NOT_FOUND = apply_middleware(not_found)
+METHOD_NOT_ALLOWED = apply_middleware(method_not_allowed)
+PREFLIGHT = apply_middleware(preflight)
+
 def handle_api_request(event, context):
-    method = event['httpMethod']
-    path = event['path']
-    
+    request = Request(event, context)
+    methods, params = resolve(request.path)
+    if methods is None:
+        return NOT_FOUND(request)
+
+    handler = methods.get(request.method)
+    if handler is None:
+        if request.method == 'OPTIONS':
+            # CORS preflight for any routed path, unless the route handles OPTIONS itself
+            return PREFLIGHT(request)
+        handler = methods.get('ANY')
+    if handler is None:
+        request.allowed = sorted(methods)
+        return METHOD_NOT_ALLOWED(request)
+    request.params = params
+    return handler(request)
+
+@route('GET', '/')
+def index(request):
+    return respond(200, {
+        'message': f'{request.method} request to {request.path}',
+        'requestId': request.request_id,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@route('GET', '/health')
+def health(request):
+    return respond(200, {'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+
+@route('ANY', '/echo/{message}')
+def echo(request):
+    return respond(200, {
+        'method': request.method,
+        'path': request.path,
+        'message': request.params['message'],
+        'query': request.query
+    })
+
+def record_source(record):
+    """Event source of a batch record ('aws:s3', 'aws:sqs', 'aws:sns', ...)"""
+    # SNS spells the key with a capital E
+    return record.get('eventSource') or record.get('EventSource') or 'unknown'
+
+def record_id(record):
+    """Identifier Lambda expects in batchItemFailures, or None for sources without partial batches"""
+    source = record_source(record)
+    if source == 'aws:sqs':
+        return record.get('messageId')
+    # The two stream payloads spell the key differently
+    if source == 'aws:kinesis':
+        return (record.get('kinesis') or {}).get('sequenceNumber')
+    if source == 'aws:dynamodb':
+        return (record.get('dynamodb') or {}).get('SequenceNumber')
+    return None
+
+def process_s3_record(record):
     return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'message': f'{method} request to {path}',
-            'requestId': context.aws_request_id,
-            'timestamp': datetime.now().isoformat()
-        })
+        'event': record['eventName'],
+        'bucket': record['s3']['bucket']['name'],
+        # Keys in S3 notifications are URL-encoded
+        'key': unquote_plus(record['s3']['object']['key']),
+        'size': record['s3']['object'].get('size')
+    }
+
+def process_sqs_record(record):
+    result = {'messageId': record['messageId'], 'bytes': len(record['body'])}
+    try:
+        body = json.loads(record['body'])
+    except ValueError:
+        return result
+    # S3 notifications delivered through a queue
+    if isinstance(body, dict) and body.get('Records'):
+        result['objects'] = [process_s3_record(inner) for inner in body['Records']
+                             if record_source(inner) == 'aws:s3']
+    return result
+
+def process_sns_record(record):
+    return {
+        'messageId': record['Sns']['MessageId'],
+        'topic': record['Sns']['TopicArn'],
+        'subject': record['Sns'].get('Subject')
     }
 
-def handle_s3_event(event, context):
-    for record in event['Records']:
-        bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
-        
+RECORD_HANDLERS = {
+    'aws:s3': process_s3_record,
+    'aws:sqs': process_sqs_record,
+    'aws:sns': process_sns_record
+}
+
+def run_record(record):
+    """Process one record, isolating its failure and timing it"""
+    source = record_source(record)
+    started = time.perf_counter()
+    try:
+        handler = RECORD_HANDLERS.get(source)
+        if handler is None:
+            raise ValueError(f'No handler for event source {source}')
+        outcome = {'source': source, 'status': 'processed', 'result': handler(record)}
+    except Exception as e:
+        print(f"Record from {source} failed: {str(e)}")
+        outcome = {'source': source, 'status': 'failed', 'error': str(e), 'id': record_id(record)}
+    outcome['ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return outcome
+
+def summarize(outcomes):
+    """Per-source counts and timings"""
+    sources = {}
+    for outcome in outcomes:
+        stats = sources.setdefault(outcome['source'], {'records': 0, 'failed': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['records'] += 1
+        stats['failed'] += outcome['status'] == 'failed'
+        stats['total_ms'] += outcome['ms']
+        stats['max_ms'] = max(stats['max_ms'], outcome['ms'])
+    for stats in sources.values():
+        stats['avg_ms'] = round(stats['total_ms'] / stats['records'], 3)
+        stats['total_ms'] = round(stats['total_ms'], 3)
+    return sources
+
+def handle_records(event, context):
+    """Fan a batch of S3/SQS/SNS records out over a bounded pool and report partial failures"""
+    records = event['Records']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(records)))) as executor:
+        outcomes = list(executor.map(run_record, records))
+
+    failed = [outcome for outcome in outcomes if outcome['status'] == 'failed']
+    summary = {
+        'records': len(records),
+        'failed': len(failed),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        'sources': summarize(outcomes)
+    }
+    print(f"Batch summary: {json.dumps(summary)}")
+
+    unretryable = [outcome for outcome in failed if outcome['id'] is None]
+    if unretryable:
+        # S3/SNS invocations are asynchronous: raising makes Lambda retry the event
+        raise RuntimeError(f"{len(unretryable)} record(s) failed: {[o['error'] for o in unretryable]}")
+
     return {
         'statusCode': 200,
         'body': json.dumps({
-            'message': f'Processed S3 object {key} from bucket {bucket}'
-        })
-    }
\ No newline at end of file
+            'message': f"Processed {len(records) - len(failed)} of {len(records)} records",
+            'summary': summary,
+            'results': [outcome.get('result') for outcome in outcomes]
+        }),
+        # Queue/stream event source mappings retry only these (needs ReportBatchItemFailures)
+        'batchItemFailures': [{'itemIdentifier': outcome['id']} for outcome in failed]
+    }
+
+# Top-level key -> handler for each supported event shape
+EVENT_SOURCES = (
+    ('httpMethod', handle_api_request),   # API Gateway REST API (payload v1)
+    ('rawPath', handle_api_request),      # API Gateway HTTP API (payload v2)
+    ('Records', handle_records)           # S3, SQS and SNS batches
+)
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lambda_function import handle_api_request, resolve, route
+
+def noop(request):
+    return request
+
+route('GET', '/orders/{id}')(noop)
+route('GET', '/orders/archive/{year}')(noop)
+route('GET', '/p/{a}/x')(noop)
+route('GET', '/p/lit/{b}/y')(noop)
+
+def test_param_matches_literal_prefix_of_longer_route():
+    """A literal branch that dead-ends falls back to the {param} branch"""
+    methods, params = resolve('/orders/archive')
+    assert 'GET' in methods
+    assert params == {'id': 'archive'}
+
+def test_literal_branch_preferred():
+    methods, params = resolve('/orders/archive/2024')
+    assert 'GET' in methods
+    assert params == {'year': '2024'}
+
+def test_backtrack_below_literal():
+    """/p/lit/x fails on the literal branch two segments down, then matches /p/{a}/x"""
+    methods, params = resolve('/p/lit/x')
+    assert 'GET' in methods
+    assert params == {'a': 'lit'}
+    assert resolve('/p/lit/7/y')[1] == {'b': '7'}
+
+def test_params_from_failed_branch_are_dropped():
+    assert resolve('/p/other/x')[1] == {'a': 'other'}
+    assert resolve('/p/lit/7/z') == (None, None)
+
+def test_echo_route():
+    response = handle_api_request({'httpMethod': 'GET', 'path': '/echo/hello%20world'}, None)
+    assert response['statusCode'] == 200
+    assert '"message": "hello world"' in response['body']
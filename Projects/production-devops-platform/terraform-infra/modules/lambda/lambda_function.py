@@ -1,16 +1,36 @@
 import json
-import boto3
 import os
+import threading
 from datetime import datetime, timedelta
-import re
-
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-logs_client = boto3.client('logs')
-ssm_client = boto3.client('ssm')
-sns_client = boto3.client('sns')
 
 CLUSTER_NAME = os.environ['EKS_CLUSTER_NAME']
 LOG_GROUP = f'/aws/containerinsights/{CLUSTER_NAME}/application'
+BEDROCK_REGION = 'us-east-1'
+
+# Clients are created on first use and reused for the container's lifetime
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(service, region=None):
+    """Return a cached boto3 client, creating it lazily on first use"""
+    region = region or os.environ.get('AWS_REGION', 'us-east-1')
+    key = (service, region)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+                client = boto3.client(service, region_name=region, config=Config(
+                    retries={'max_attempts': 5, 'mode': 'adaptive'},
+                    max_pool_connections=10,
+                    connect_timeout=5,
+                    read_timeout=60,
+                    tcp_keepalive=True
+                ))
+                _clients[key] = client
+    return client
 
 def lambda_handler(event, context):
     """Main Lambda handler for AI-powered remediation"""
@@ -55,7 +75,7 @@ def fetch_logs(log_group, minutes=10):
     start_time = int((datetime.now() - timedelta(minutes=minutes)).timestamp() * 1000)
     
     try:
-        response = logs_client.filter_log_events(
+        response = get_client('logs').filter_log_events(
             logGroupName=log_group,
             startTime=start_time,
             limit=100
@@ -84,7 +104,7 @@ Respond ONLY with valid JSON in this exact format:
 {{"root_cause": "description", "action": "restart_pods", "confidence": "high"}}"""
 
     try:
-        response = bedrock.invoke_model(
+        response = get_client('bedrock-runtime', BEDROCK_REGION).invoke_model_with_response_stream(
             modelId='anthropic.claude-3-sonnet-20240229-v1:0',
             body=json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
@@ -94,13 +114,16 @@ Respond ONLY with valid JSON in this exact format:
             })
         )
         
-        result = json.loads(response['body'].read())
-        content = result['content'][0]['text']
+        stream = response['body']
+        try:
+            # Stop reading as soon as the first complete decision object arrives
+            decision = first_json_object(stream_text(stream))
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
         
-        # Parse JSON from response
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        if decision is not None:
+            return decision
         
         return {
             "root_cause": "Unable to parse AI response",
@@ -116,6 +139,53 @@ Respond ONLY with valid JSON in this exact format:
             "confidence": "low"
         }
 
+def stream_text(stream):
+    """Yield text deltas from a Bedrock response stream (any iterable of events)"""
+    for event in stream:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = json.loads(chunk['bytes'])
+        if payload.get('type') == 'content_block_delta':
+            text = payload.get('delta', {}).get('text')
+            if text:
+                yield text
+
+def first_json_object(text_chunks):
+    """Return the first complete JSON object with an 'action' key, reading no further"""
+    buffer = []
+    depth = 0
+    in_string = False
+    escaped = False
+    
+    for text in text_chunks:
+        for char in text:
+            if depth:
+                buffer.append(char)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = depth > 0
+            elif char == '{':
+                if not depth:
+                    buffer = [char]
+                depth += 1
+            elif char == '}' and depth:
+                depth -= 1
+                if not depth:
+                    try:
+                        candidate = json.loads(''.join(buffer))
+                    except ValueError:
+                        continue
+                    if isinstance(candidate, dict) and 'action' in candidate:
+                        return candidate
+    return None
+
 def execute_remediation(analysis):
     """Execute remediation action based on AI analysis"""
     
@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('EKS_CLUSTER_NAME', 'test-cluster')
+
+import lambda_function
+from lambda_function import first_json_object, stream_text
+
+def delta(text):
+    """Stream event carrying one content_block_delta, as Bedrock sends it"""
+    payload = {'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}}
+    return {'chunk': {'bytes': json.dumps(payload).encode()}}
+
+class FakeStream:
+    """Local stand-in for a Bedrock response stream that records how far it was read"""
+
+    def __init__(self, events):
+        self.events = events
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            self.read += 1
+            yield event
+
+    def close(self):
+        self.closed = True
+
+class FakeBedrock:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        return {'body': self.stream}
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    """Install a fake bedrock-runtime client in the client cache"""
+    def install(events):
+        stream = FakeStream(events)
+        monkeypatch.setitem(lambda_function._clients, ('bedrock-runtime', lambda_function.BEDROCK_REGION),
+                            FakeBedrock(stream))
+        return stream
+    return install
+
+def test_stream_text_skips_non_delta_events():
+    """Only content_block_delta text is yielded"""
+    events = [
+        {'chunk': {'bytes': json.dumps({'type': 'message_start'}).encode()}},
+        delta('ab'),
+        {'metadata': {}},
+        delta('c'),
+        {'chunk': {'bytes': json.dumps({'type': 'message_stop'}).encode()}}
+    ]
+    assert list(stream_text(events)) == ['ab', 'c']
+
+def test_object_split_across_chunks():
+    """An object split at every character is reassembled"""
+    text = 'Here you go: {"root_cause": "OOM", "action": "restart_pods", "confidence": "high"} done'
+    assert first_json_object(iter(text)) == {
+        'root_cause': 'OOM', 'action': 'restart_pods', 'confidence': 'high'
+    }
+
+def test_braces_inside_strings():
+    """Braces and escaped quotes inside string values do not end the object"""
+    chunks = ['{"root_cause": "bad conf', 'ig {x: \\"}\\"}", "ac', 'tion": "none", "confidence": "low"}']
+    assert first_json_object(chunks) == {
+        'root_cause': 'bad config {x: "}"}', 'action': 'none', 'confidence': 'low'
+    }
+
+def test_skips_objects_without_action():
+    """Nested or unrelated objects before the decision are ignored"""
+    chunks = ['{"example": {"a": 1}} then ', '{"action": "scale_up", "confidence": "medium"}']
+    assert first_json_object(chunks) == {'action': 'scale_up', 'confidence': 'medium'}
+
+def test_trailing_partial_object():
+    """A stream that ends mid-object yields no decision"""
+    assert first_json_object(['{"action": "restart_pods", ', '"confidence": "hi']) is None
+
+def test_stops_reading_after_first_object(bedrock):
+    """analyze_with_ai returns on the first decision and closes the stream"""
+    stream = bedrock([
+        delta('{"root_cause": "crash loop", '),
+        delta('"action": "rollback_deployment", "confidence": "high"}'),
+        delta(' Explanation that is never read'),
+        delta(' and more')
+    ])
+    analysis = lambda_function.analyze_with_ai('logs', 'alarm')
+    assert analysis['action'] == 'rollback_deployment'
+    assert stream.read == 2
+    assert stream.closed
+
+def test_unparseable_response(bedrock):
+    """A stream with no decision object falls back to no action"""
+    stream = bedrock([delta('I am not sure '), delta('what happened {')])
+    analysis = lambda_function.analyze_with_ai('logs', 'alarm')
+    assert analysis['action'] == 'none'
+    assert analysis['confidence'] == 'low'
+    assert stream.closed
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for log_analyzer.analyze_paths
+
+    python3 bench_log_analyzer.py [logfile ...]
+
+Without arguments a ~500 MB sample log is generated in the temp directory.
+Runs the analysis with 1, 2, 4, ... workers up to the CPU count and prints
+time, throughput and speedup over one worker.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from log_analyzer import analyze_paths
+
+LEVELS = ['INFO'] * 80 + ['WARNING'] * 10 + ['ERROR'] * 5 + ['DEBUG'] * 5
+MESSAGES = {
+    'INFO': ['User logged in', 'Request served', 'Cache hit'],
+    'WARNING': ['Retry attempt 1', 'Slow query'],
+    'ERROR': ['Database connection failed', 'Timeout exception', 'Invalid credentials'],
+    'DEBUG': ['Heartbeat']
+}
+
+def generate_sample(path, lines=12_000_000):
+    random.seed(0)
+    with open(path, 'w') as f:
+        batch = []
+        for i in range(lines):
+            level = random.choice(LEVELS)
+            batch.append(f"2024-01-15 {i // 500000 % 24:02d}:{i // 8400 % 60:02d}:{i % 60:02d} "
+                         f"{level} {random.choice(MESSAGES[level])}\n")
+            if len(batch) == 100000:
+                f.write(''.join(batch))
+                batch = []
+        f.write(''.join(batch))
+
+def worker_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+def main():
+    paths = sys.argv[1:]
+    if not paths:
+        path = os.path.join(tempfile.gettempdir(), 'log_analyzer_bench.log')
+        if not os.path.exists(path):
+            print(f"Generating {path} ...")
+            generate_sample(path)
+        paths = [path]
+
+    size = sum(os.path.getsize(p) for p in paths) / 1e6
+    print(f"{len(paths)} file(s), {size:.0f} MB")
+    baseline = None
+    for workers in worker_counts():
+        started = time.perf_counter()
+        stats = analyze_paths(paths, workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:3} worker(s): {elapsed:6.2f}s  {size / elapsed:7.1f} MB/s  "
+              f"{baseline / elapsed:4.1f}x  ({stats.total_lines} lines)")
+
+if __name__ == '__main__':
+    main()
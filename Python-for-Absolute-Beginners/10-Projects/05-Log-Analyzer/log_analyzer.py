@@ -1,48 +1,613 @@
 #!/usr/bin/env python3
 """
-Log File Analyzer - Starter Code
+Log File Analyzer
+
+Streams log files in large binary chunks and parses lines in the format
+
+    YYYY-MM-DD HH:MM:SS LEVEL Message
+
+Memory use does not grow with the file: lines are never all held at once,
+and the most frequent messages are tracked by a bounded heavy-hitters
+counter instead of counting every distinct message.
+
+Many files (globs, .gz included) are analyzed on a process pool; large
+files are split into newline-aligned byte ranges and the per-range
+statistics are merged.
+
+With --follow a single growing log is tailed instead: statistics update
+as lines arrive, rolling per-minute windows are printed, and the read
+position is checkpointed so a restart picks up where it left off.
 """
 
+import argparse
+import glob
+import gzip
+import json
+import os
 import re
 import sys
+import time
 from collections import Counter
+from operator import itemgetter
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Plain files larger than this are split into byte ranges analyzed in parallel
+SPLIT_SIZE = 64 * 1024 * 1024
+
+# Leading bytes of a followed file remembered to recognize it after a copytruncate rotation
+HEAD_SIZE = 256
+
+# Distinct messages tracked for the top-N list; counts stay exact while there are fewer than this
+TOP_CAPACITY = 10000
+
+# Fixed layout "YYYY-MM-DD HH:MM:SS LEVEL Message", matched over whole blocks at once
+STRICT_STAMP = re.compile(rb'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d')
+# Whole 'YYYY-MM-DD HH:MM:SS LEVEL' prefix: min/max give the time range, [20:] is the level
+STRICT_PREFIX = re.compile(rb'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d [A-Z]+', re.M)
+MINUTE_LEVEL = re.compile(rb'^(\d{4}-\d\d-\d\d \d\d:\d\d):\d\d ([A-Z]+)', re.M)
+IRREGULAR_LINE = re.compile(rb'^(?!\d{4}-\d\d-\d\d \d\d:\d\d:\d\d [A-Z])[^\n]+', re.M)
+
+# Per-line fallback for other layouts (e.g. 'T' separator, milliseconds, extra spaces)
+LOG_PATTERN = re.compile(rb'^(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(?:[.,]\d+)?[ \t]+([A-Z]+)(?:[ \t]+(.*?))?\s*$')
+
+class TopMessages:
+    """
+    Bounded heavy-hitters counter (Misra-Gries style)
+
+    When more than 2 x capacity distinct messages are held, only the
+    `capacity` most frequent are kept. Any message that occurs more often
+    than `error` times is guaranteed to be present, and its count is at most
+    `error` below the true count.
+    """
+
+    def __init__(self, capacity=TOP_CAPACITY):
+        self.capacity = capacity
+        self.counts = Counter()
+        self.error = 0
+
+    def update(self, messages):
+        self.counts.update(messages)
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def _prune(self):
+        kept = self.counts.most_common(self.capacity)
+        evicted = self.counts[kept[-1][0]] if kept else 0
+        self.error += evicted
+        self.counts = Counter(dict(kept))
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.error += other.error
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+        return self
+
+    def most_common(self, n):
+        return self.counts.most_common(n)
+
+class LogStats:
+    """Statistics for one stream of log lines; feed() it blocks of complete lines"""
+
+    def __init__(self, message_level='ERROR', capacity=TOP_CAPACITY):
+        self.message_level = message_level.upper()
+        self.total_lines = 0
+        self.unparsed = 0
+        self.levels = Counter()
+        self.top = TopMessages(capacity)
+        self.per_hour = Counter()  # 'YYYY-MM-DD HH' -> lines at message_level
+        self.first = None
+        self.last = None
+        self._wanted = re.compile(rb' ' + re.escape(self.message_level.encode()) + rb'(?=[ \r\n]|$)([^\n]*)')
+
+    def feed(self, block):
+        """Count every line of a bytes block that ends on a line boundary"""
+        lines = block.count(b'\n') + (not block.endswith(b'\n'))
+        self.total_lines += lines
+
+        # Whole-block regex passes; Python only loops over lines at message_level
+        parsed = STRICT_PREFIX.findall(block)
+        levels = Counter(map(itemgetter(slice(20, None)), parsed))
+        # Min and max over every parsed line, so the time range holds for out-of-order logs
+        # and does not depend on where chunks or ranges were cut
+        stamps = [min(parsed)[:19], max(parsed)[:19]] if parsed else []
+        hours = []
+        messages = []
+        for match in self._wanted.finditer(block):
+            start = match.start() - 19
+            # The level column only, not the same word inside some other line's message
+            if start >= 0 and (start == 0 or block[start - 1] == 10) and STRICT_STAMP.match(block, start):
+                hours.append(block[start:start + 13])
+                messages.append(match.group(1).strip())
+
+        if len(parsed) < lines:
+            # Some lines are not in the fixed layout: parse just those with the flexible pattern
+            wanted = self.message_level.encode()
+            for date, clock, level, message in irregular_lines(block):
+                levels[level] += 1
+                stamps.append(date + b' ' + clock)
+                if level == wanted:
+                    hours.append(date + b' ' + clock[:2])
+                    messages.append(message)
+
+        self.unparsed += lines - sum(levels.values())
+        for level, count in levels.items():
+            self.levels[level.decode('ascii')] += count
+        self.per_hour.update(hours)
+        self.top.update(messages)
+        if stamps:
+            self._see(min(stamps))
+            self._see(max(stamps))
+
+    def _see(self, stamp):
+        if stamp is None:
+            return
+        if self.first is None or stamp < self.first:
+            self.first = stamp
+        if self.last is None or stamp > self.last:
+            self.last = stamp
+
+    def merge(self, other):
+        """Combine statistics from another part of the log (order does not matter)"""
+        self.total_lines += other.total_lines
+        self.unparsed += other.unparsed
+        self.levels.update(other.levels)
+        self.top.merge(other.top)
+        self.per_hour.update(other.per_hour)
+        self._see(other.first)
+        self._see(other.last)
+        return self
+
+    def to_dict(self, top=10):
+        parsed = self.total_lines - self.unparsed
+        text = lambda value: value.decode('utf-8', 'replace') if value is not None else None
+        peak = self.per_hour.most_common(1)
+        return {
+            'total_lines': self.total_lines,
+            'parsed_lines': parsed,
+            'unparsed_lines': self.unparsed,
+            'first_timestamp': text(self.first),
+            'last_timestamp': text(self.last),
+            'levels': {
+                level: {'count': count, 'percent': round(100 * count / parsed, 2) if parsed else 0.0}
+                for level, count in self.levels.most_common()
+            },
+            'message_level': self.message_level,
+            'top_messages': [{'message': text(message), 'count': count}
+                             for message, count in self.top.most_common(top)],
+            'top_messages_max_error': self.top.error,
+            'per_hour': {text(hour): count for hour, count in sorted(self.per_hour.items())},
+            'peak_hour': {'hour': text(peak[0][0]), 'count': peak[0][1]} if peak else None
+        }
+
+def irregular_lines(block):
+    """(date, clock, level, message) of the lines not in the fixed layout that LOG_PATTERN parses"""
+    for line in IRREGULAR_LINE.findall(block):
+        match = LOG_PATTERN.match(line)
+        if match is not None:
+            yield match.groups(b'')
 
 def parse_log_line(line):
-    """Parse a single log line"""
-    # TODO: Extract timestamp, level, message using regex
-    # Pattern: YYYY-MM-DD HH:MM:SS LEVEL Message
-    pass
-
-def analyze_log_file(filename):
-    """Analyze log file and return statistics"""
-    # TODO: Implement
-    # 1. Read file
-    # 2. Parse each line
-    # 3. Count by level
-    # 4. Find common errors
-    # 5. Return statistics
-    pass
-
-def generate_report(stats):
+    """Parse a single log line into timestamp, level and message (None if it doesn't match)"""
+    if isinstance(line, str):
+        line = line.encode()
+    match = LOG_PATTERN.match(line.rstrip(b'\r\n'))
+    if match is None:
+        return None
+    date, clock, level, message = match.groups()
+    return {
+        'timestamp': f"{date.decode()} {clock.decode()}",
+        'level': level.decode(),
+        'message': (message or b'').decode('utf-8', 'replace')
+    }
+
+def read_chunks(f, chunk_size=CHUNK_SIZE, start=0, end=None):
+    """
+    Raw chunks of the lines that start in [start, end)
+
+    A line that starts before `start` belongs to the previous range and is
+    skipped; the line running past `end` is read to its newline.
+    """
+    if start > 0:
+        f.seek(start - 1)
+        f.readline()
+    position = f.tell() if start > 0 else 0
+    while end is None or position < end:
+        size = chunk_size if end is None else min(chunk_size, end - position)
+        chunk = f.read(size)
+        if not chunk:
+            break
+        position += len(chunk)
+        if end is not None and position >= end and not chunk.endswith(b'\n'):
+            chunk += f.readline()
+        yield chunk
+
+def take_block(pending, chunk):
+    """
+    Complete lines of pending + chunk, or None if chunk has no newline
+
+    pending is a bytearray holding the partial last line; it is extended in
+    place, so a long line spread over many chunks costs linear time.
+    """
+    cut = chunk.rfind(b'\n')
+    if cut < 0:
+        pending += chunk
+        return None
+    if pending:
+        pending += memoryview(chunk)[:cut + 1]
+        block = bytes(pending)
+        pending.clear()
+    else:
+        block = chunk[:cut + 1]
+    pending += memoryview(chunk)[cut + 1:]
+    return block
+
+def iter_blocks(chunks):
+    """Join raw chunks into blocks that end on a line boundary"""
+    pending = bytearray()
+    for chunk in chunks:
+        block = take_block(pending, chunk)
+        if block is not None:
+            yield block
+    if pending:
+        yield bytes(pending)
+
+def open_log(filename):
+    """Binary reader for a plain or gzip-compressed log"""
+    return gzip.open(filename, 'rb') if filename.endswith('.gz') else open(filename, 'rb')
+
+def analyze_log_file(filename, message_level='ERROR', chunk_size=CHUNK_SIZE, start=0, end=None):
+    """Analyze log file (or the lines starting in one byte range of it) and return statistics"""
+    stats = LogStats(message_level)
+    with open_log(filename) as f:
+        for block in iter_blocks(read_chunks(f, chunk_size, start, end)):
+            stats.feed(block)
+    return stats
+
+def expand_paths(patterns):
+    """Files matching each path or glob, in order, without duplicates"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise FileNotFoundError(f"No files match {pattern}")
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def plan_ranges(paths, split_size=SPLIT_SIZE):
+    """(path, start, end) work items; large plain files are split into byte ranges, .gz files can't be"""
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith('.gz') or size <= split_size:
+            tasks.append((path, 0, None))
+            continue
+        for start in range(0, size, split_size):
+            tasks.append((path, start, min(start + split_size, size)))
+    # Biggest first, so a large .gz file doesn't start last and leave the other workers idle
+    tasks.sort(key=lambda task: -((task[2] or os.path.getsize(task[0])) - task[1]))
+    return tasks
+
+def _analyze_task(args):
+    path, start, end, message_level, chunk_size = args
+    return analyze_log_file(path, message_level, chunk_size, start, end)
+
+def analyze_paths(patterns, message_level='ERROR', workers=None, split_size=SPLIT_SIZE, chunk_size=CHUNK_SIZE):
+    """Analyze many files/globs on a process pool and merge the partial statistics"""
+    tasks = [(path, start, end, message_level, chunk_size)
+             for path, start, end in plan_ranges(expand_paths(patterns), split_size)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    stats = LogStats(message_level)
+    if workers <= 1:
+        for task in tasks:
+            stats.merge(_analyze_task(task))
+        return stats
+
+    # Merging is associative and order-independent, so results are folded in as they finish
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_analyze_task, task) for task in tasks]
+        for future in as_completed(futures):
+            stats.merge(future.result())
+    return stats
+
+class RollingWindow:
+    """Per-minute level counts for the most recent `minutes` minutes of log time"""
+
+    def __init__(self, minutes=5, message_level='ERROR'):
+        if minutes < 1:
+            raise ValueError('The rolling window must be at least 1 minute')
+        self.minutes = minutes
+        self.message_level = message_level.upper()
+        self.buckets = {}  # 'YYYY-MM-DD HH:MM' -> Counter of levels
+
+    def feed(self, block):
+        """Count lines per minute, parsing the same layouts as LogStats"""
+        counts = Counter(MINUTE_LEVEL.findall(block))
+        lines = block.count(b'\n') + (not block.endswith(b'\n'))
+        if sum(counts.values()) < lines:
+            for date, clock, level, _ in irregular_lines(block):
+                counts[(date + b' ' + clock[:5], level)] += 1
+        for (minute, level), count in counts.items():
+            self.buckets.setdefault(minute.decode(), Counter())[level.decode('ascii')] += count
+        self._prune()
+
+    def _prune(self):
+        """Drop minutes older than the window, measured back from the newest minute seen"""
+        if not self.buckets:
+            return
+        newest = datetime.strptime(max(self.buckets), '%Y-%m-%d %H:%M')
+        cutoff = (newest - timedelta(minutes=self.minutes - 1)).strftime('%Y-%m-%d %H:%M')
+        for minute in [minute for minute in self.buckets if minute < cutoff]:
+            del self.buckets[minute]
+
+    def summary(self):
+        rate = lambda hits, total: round(100 * hits / total, 2) if total else 0.0
+        rows = []
+        for minute in sorted(self.buckets):
+            counts = self.buckets[minute]
+            lines = sum(counts.values())
+            hits = counts[self.message_level]
+            rows.append({'minute': minute, 'lines': lines, 'count': hits, 'rate': rate(hits, lines)})
+        lines = sum(row['lines'] for row in rows)
+        hits = sum(row['count'] for row in rows)
+        return {'level': self.message_level, 'minutes': rows, 'lines': lines, 'count': hits, 'rate': rate(hits, lines)}
+
+def default_checkpoint_path(path):
+    """Checkpoint file for a log in the user's state directory (the log's own directory is often read-only)"""
+    state = os.environ.get('XDG_STATE_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'state')
+    name = os.path.abspath(path).strip(os.sep).replace(os.sep, '_')
+    return os.path.join(state, 'log-analyzer', f"{name}.checkpoint")
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(path, checkpoint):
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp = f"{path}.tmp"
+    with open(temp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temp, path)
+
+class LogFollower:
+    """
+    Tail a growing log file, feeding complete lines to LogStats and a RollingWindow
+
+    The file is identified by device and inode. A new inode at the path
+    means it was rotated: the rest of the old file is read, then the new
+    one from its start. A file that is shorter than our offset, or whose
+    first HEAD_SIZE bytes changed (copytruncate followed by new writes), was
+    truncated and is reread from the start. Only offsets of complete lines
+    are checkpointed, together with the leading bytes.
+    """
+
+    def __init__(self, path, checkpoint_path, stats, window, from_start=False):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.stats = stats
+        self.window = window
+        self.f = None
+        self.file_id = None
+        self.offset = 0
+        self.head = b''
+        self.pending = bytearray()
+        self.checkpoint_error = None
+        self._open(from_start)
+
+    def _open(self, from_start, resume=True):
+        self.f = open(self.path, 'rb')
+        info = os.fstat(self.f.fileno())
+        self.file_id = [info.st_dev, info.st_ino]
+        self.head = self._read_head()
+        saved = load_checkpoint(self.checkpoint_path) if resume else None
+        if saved and saved.get('file_id') == self.file_id and saved.get('offset', 0) <= info.st_size \
+                and self.head.startswith(bytes.fromhex(saved.get('head', ''))):
+            self.offset = saved['offset']
+        elif saved or not resume or from_start:
+            # Rotated while we were stopped, or a fresh file: everything in it is new
+            self.offset = 0
+        else:
+            self.offset = info.st_size
+        self.f.seek(self.offset)
+        self.pending = bytearray()
+
+    def _read_head(self):
+        """First HEAD_SIZE bytes of the open file, leaving the read position unchanged"""
+        position = self.f.tell()
+        self.f.seek(0)
+        head = self.f.read(HEAD_SIZE)
+        self.f.seek(position)
+        return head
+
+    def _consume(self, final=False):
+        """Feed everything readable from the current file; returns bytes read"""
+        read = 0
+        while True:
+            chunk = self.f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            block = take_block(self.pending, chunk)
+            if block is None:
+                continue
+            self.stats.feed(block)
+            self.window.feed(block)
+            self.offset += len(block)
+        if final and self.pending:
+            # Last line of a rotated file, never to be completed
+            block = bytes(self.pending)
+            self.stats.feed(block)
+            self.window.feed(block)
+            self.pending.clear()
+        return read
+
+    def _truncated(self, info):
+        """True if the file was truncated, even when it has since grown past our offset"""
+        if info.st_size < self.offset + len(self.pending):
+            return True
+        head = self._read_head()
+        if not head.startswith(self.head):
+            return True
+        # Remember more of the head as a short file grows
+        self.head = head
+        return False
+
+    def poll(self):
+        """Process lines appended since the last poll, following rotation and truncation"""
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away and the new file isn't there yet
+            return self._consume()
+        if [info.st_dev, info.st_ino] != self.file_id:
+            read = self._consume(final=True)
+            self.f.close()
+            self._open(from_start=True, resume=False)
+            return read + self._consume()
+        # Checked before reading, so the rewritten file's bytes past our old offset are not counted
+        if self._truncated(info):
+            print(f"{self.path} was truncated, reading from the start", file=sys.stderr)
+            self.f.seek(0)
+            self.offset = 0
+            self.head = self._read_head()
+            self.pending.clear()
+        return self._consume()
+
+    def checkpoint(self):
+        """Save the position; a failed write is reported once and following carries on"""
+        try:
+            save_checkpoint(self.checkpoint_path, {'path': self.path, 'file_id': self.file_id, 'offset': self.offset,
+                                                   'head': self.head.hex()})
+        except OSError as e:
+            if self.checkpoint_error is None:
+                print(f"Warning: cannot save checkpoint ({e}); a restart will not resume from here", file=sys.stderr)
+            self.checkpoint_error = e
+            return
+        self.checkpoint_error = None
+
+    def close(self):
+        self.checkpoint()
+        self.f.close()
+
+def print_window(summary):
+    latest = summary['minutes'][-1] if summary['minutes'] else None
+    if latest is None:
+        return
+    print(f"[{latest['minute']}] {latest['lines']} lines, {summary['level']} {latest['count']} ({latest['rate']}%) | "
+          f"last {len(summary['minutes'])} min: {summary['lines']} lines, {summary['level']} {summary['rate']}%")
+
+def follow_log(path, message_level='ERROR', checkpoint_path=None, window_minutes=5, interval=10.0,
+               poll_interval=1.0, from_start=False, json_output=False):
+    """Tail one log until interrupted, printing rolling statistics every `interval` seconds"""
+    stats = LogStats(message_level)
+    window = RollingWindow(window_minutes, message_level)
+    follower = LogFollower(path, checkpoint_path or default_checkpoint_path(path), stats, window, from_start)
+    # Status goes to stderr so --json output on stdout stays one JSON object per line
+    print(f"Following {path} from byte {follower.offset} (Ctrl+C to stop)", file=sys.stderr)
+
+    next_report = time.monotonic() + interval
+    try:
+        while True:
+            if not follower.poll():
+                time.sleep(poll_interval)
+            if time.monotonic() >= next_report:
+                summary = window.summary()
+                if json_output:
+                    print(json.dumps(summary))
+                else:
+                    print_window(summary)
+                follower.checkpoint()
+                next_report = time.monotonic() + interval
+    except KeyboardInterrupt:
+        print(file=sys.stderr)
+    finally:
+        follower.close()
+    return stats
+
+def generate_report(stats, top=10, file=None):
     """Generate and print analysis report"""
-    # TODO: Implement
-    pass
+    data = stats.to_dict(top) if isinstance(stats, LogStats) else stats
+    file = file or sys.stdout
+    print("=== Log Analysis Report ===", file=file)
+    print(f"Total Lines: {data['total_lines']}", file=file)
+    if data['unparsed_lines']:
+        print(f"Unparsed Lines: {data['unparsed_lines']}", file=file)
+    if data['first_timestamp']:
+        print(f"Time Range: {data['first_timestamp']} - {data['last_timestamp']}", file=file)
+    for level, info in data['levels'].items():
+        print(f"{level}: {info['count']} ({info['percent']}%)", file=file)
+
+    print(f"\nTop {top} {data['message_level']} Messages:", file=file)
+    for i, entry in enumerate(data['top_messages'], 1):
+        print(f"{i}. {entry['message']} ({entry['count']} times)", file=file)
+    if data['top_messages_max_error']:
+        print(f"(counts may be up to {data['top_messages_max_error']} low: too many distinct messages to track exactly)", file=file)
+    if data['peak_hour']:
+        print(f"\nPeak Hour: {data['peak_hour']['hour']}:00 ({data['peak_hour']['count']} {data['message_level']})", file=file)
 
-def export_to_json(stats, output_file):
+def export_to_json(stats, output_file, top=10, file=None):
     """Export statistics to JSON"""
-    # TODO: Implement
-    pass
+    data = stats.to_dict(top) if isinstance(stats, LogStats) else stats
+    with open(output_file, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"\nReport exported to {output_file}", file=file or sys.stdout)
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python3 log_analyzer.py <logfile>")
-        return
-    
-    logfile = sys.argv[1]
-    
-    # TODO: Implement main logic
-    print(f"Analyzing: {logfile}")
+    parser = argparse.ArgumentParser(description='Analyze YYYY-MM-DD HH:MM:SS LEVEL Message logs')
+    parser.add_argument('logfiles', nargs='+', metavar='logfile', help='log files or globs (.gz supported)')
+    parser.add_argument('--level', default='ERROR', help='level whose messages are ranked (default ERROR)')
+    parser.add_argument('--top', type=int, default=10, help='number of top messages to show')
+    parser.add_argument('--export', metavar='FILE', help='also write the statistics to a JSON file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: CPU count; 1 runs in-process)')
+    parser.add_argument('--split-size', type=int, default=SPLIT_SIZE // (1024 * 1024), metavar='MB',
+                        help='split plain files larger than this into ranges of this size (default 64)')
+    parser.add_argument('--follow', action='store_true', help='tail one growing log and print rolling statistics')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='follow mode position file (default: under $XDG_STATE_HOME or ~/.local/state/log-analyzer)')
+    parser.add_argument('--window', type=positive_int, default=5, metavar='MINUTES',
+                        help='follow mode rolling window (default 5)')
+    parser.add_argument('--interval', type=float, default=10, metavar='SECONDS',
+                        help='follow mode report interval (default 10)')
+    parser.add_argument('--from-start', action='store_true',
+                        help='follow mode without a checkpoint: read the existing content first instead of only new lines')
+    parser.add_argument('--json', action='store_true', help='follow mode: print window summaries as JSON lines')
+    args = parser.parse_args()
+
+    try:
+        if args.follow:
+            if len(args.logfiles) != 1:
+                parser.error('--follow takes exactly one logfile')
+            stats = follow_log(args.logfiles[0], args.level, args.checkpoint, args.window, args.interval,
+                               from_start=args.from_start, json_output=args.json)
+        else:
+            stats = analyze_paths(args.logfiles, args.level, args.workers, args.split_size * 1024 * 1024)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # With --follow --json, stdout carries only the JSON lines
+    report_file = sys.stderr if args.follow and args.json else sys.stdout
+    generate_report(stats, args.top, report_file)
+    if args.export:
+        export_to_json(stats, args.export, args.top, report_file)
 
 if __name__ == "__main__":
     main()
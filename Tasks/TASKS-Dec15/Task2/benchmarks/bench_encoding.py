@@ -0,0 +1,65 @@
+"""
+Microbenchmark: encoding a 10k-product list_products payload
+
+    python benchmarks/bench_encoding.py [items] [repeats]
+
+Compares the old DecimalEncoder (JSONEncoder.default + float) with
+product_response.dumps, and shows the gzip size of the body. Run it with
+and without orjson installed to compare both encoder paths.
+"""
+
+import gzip
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+import product_response
+from product_response import dumps
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def make_items(count):
+    """Products shaped like DynamoDB returns them (every number is a Decimal)"""
+    return [
+        {
+            'productId': f'P{i:06d}',
+            'name': f'Product {i}',
+            'price': Decimal(f'{i % 1000}.{i % 100:02d}'),
+            'description': 'Sample product description for benchmarking',
+            'category': ['electronics', 'books', 'toys'][i % 3],
+            'stock': Decimal(i % 250),
+            'rating': Decimal('4.5')
+        }
+        for i in range(count)
+    ]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    payload = {'products': make_items(count), 'count': count}
+
+    old = lambda: json.dumps(payload, cls=DecimalEncoder)
+    new = lambda: dumps(payload)
+
+    # Same values (the old encoder only differs in precision for long decimals)
+    assert json.loads(old()) == json.loads(new())
+
+    old_ms = min(timeit.repeat(old, number=1, repeat=repeats)) * 1000
+    new_ms = min(timeit.repeat(new, number=1, repeat=repeats)) * 1000
+    body = new().encode()
+
+    backend = 'orjson' if product_response.orjson is not None else 'json module'
+    print(f"{count} items, best of {repeats}, product_response using {backend}")
+    print(f"  DecimalEncoder (default hook): {old_ms:8.2f} ms")
+    print(f"  product_response.dumps:        {new_ms:8.2f} ms  ({old_ms / new_ms:.1f}x)")
+    print(f"  body {len(body) / 1024:.0f} KiB, gzip {len(gzip.compress(body, compresslevel=5)) / 1024:.0f} KiB")
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,17 @@
-import json
 import boto3
 from decimal import Decimal
 
+from product_cache import ProductCache, connect_shared
+from product_index import index_attributes
+from product_response import error, request_body, respond
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('Products')
+cache = ProductCache(dynamodb, 'Products', shared=connect_shared())
 
 def lambda_handler(event, context):
     try:
-        body = json.loads(event['body'])
+        body = request_body(event)
         
         item = {
             'productId': body['productId'],
@@ -15,26 +19,18 @@ def lambda_handler(event, context):
             'price': Decimal(str(body['price'])),
             'description': body.get('description', '')
         }
+        if body.get('category'):
+            item['category'] = body['category']
+        item.update(index_attributes(item))
         
         table.put_item(Item=item)
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'message': 'Product added successfully',
-                'productId': body['productId']
-            })
-        }
+        # Readers must not keep serving the old item (or a cached 404)
+        cache.invalidate(item['productId'])
+        
+        return respond(200, {
+            'message': 'Product added successfully',
+            'productId': body['productId']
+        })
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error(500, str(e))
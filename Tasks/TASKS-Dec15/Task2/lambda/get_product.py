@@ -1,46 +1,31 @@
-import json
 import boto3
-from decimal import Decimal
+
+from product_cache import ProductCache, connect_shared
+from product_response import error, respond
 
 dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('Products')
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Module level so the LRU and shared connection survive between invocations
+cache = ProductCache(dynamodb, 'Products', shared=connect_shared())
 
 def lambda_handler(event, context):
     try:
         product_id = event['pathParameters']['id']
         
-        response = table.get_item(Key={'productId': product_id})
+        # /products/P001,P002,... fetches several products in one request
+        if ',' in product_id:
+            product_ids = [pid.strip() for pid in product_id.split(',') if pid.strip()]
+            found = cache.get_many(product_ids)
+            return respond(200, {
+                'products': [found[pid] for pid in product_ids if pid in found],
+                'missing': [pid for pid in product_ids if pid not in found]
+            }, event)
+        
+        item = cache.get(product_id)
         
-        if 'Item' in response:
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps(response['Item'], cls=DecimalEncoder)
-            }
+        if item is not None:
+            return respond(200, item, event)
         else:
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Product not found'})
-            }
+            return error(404, 'Product not found')
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error(500, str(e))
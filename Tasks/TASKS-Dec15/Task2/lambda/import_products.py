@@ -0,0 +1,192 @@
+import codecs
+import csv
+import hashlib
+import json
+import time
+import boto3
+from decimal import Decimal, InvalidOperation
+
+from product_cache import ProductCache, connect_shared
+from product_index import index_attributes
+from product_response import error, request_body, respond
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+cache = ProductCache(dynamodb, 'Products', shared=connect_shared())
+
+# Rows are checked against stored hashes 100 at a time (batch_get_item limit)
+# and written 25 at a time (batch_write_item limit)
+READ_BATCH = 100
+WRITE_BATCH = 25
+MAX_UNPROCESSED_RETRIES = 5
+
+def validate_product(row):
+    """Product item from an input row; raises ValueError describing the first problem"""
+    if not isinstance(row, dict):
+        raise ValueError('Row must be an object')
+    product_id = str(row.get('productId') or '').strip()
+    if not product_id:
+        raise ValueError('productId is required')
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+    try:
+        price = Decimal(str(row.get('price')).strip())
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid price '{row.get('price')}'")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"Invalid price '{row.get('price')}'")
+
+    item = {
+        'productId': product_id,
+        'name': name,
+        'price': price,
+        'description': str(row.get('description') or '')
+    }
+    if row.get('category'):
+        item['category'] = str(row['category']).strip()
+    item['contentHash'] = content_hash(item)
+    item.update(index_attributes(item))
+    return item
+
+def content_hash(item):
+    """Stable hash of a product's content, stored with it so re-imports of unchanged rows are skipped"""
+    canonical = json.dumps(
+        {key: canonical_value(value) for key, value in item.items() if key != 'contentHash'},
+        sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def canonical_value(value):
+    """String form that is equal for equal numbers (1.50 and 1.5), as DynamoDB stores them"""
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    return str(value)
+
+def iter_s3_rows(bucket, key):
+    """Stream rows from an NDJSON, CSV or JSON array object in S3"""
+    body = s3.get_object(Bucket=bucket, Key=key)['Body']
+    lowered = key.lower()
+    if lowered.endswith('.csv'):
+        yield from csv.DictReader(codecs.iterdecode(body.iter_lines(), 'utf-8-sig'))
+    elif lowered.endswith(('.ndjson', '.jsonl')):
+        for line in body.iter_lines():
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f'Invalid JSON: {str(e)}')
+    else:
+        rows = json.load(body)
+        if not isinstance(rows, list):
+            raise ValueError('JSON import objects must contain an array of products')
+        yield from rows
+
+def existing_hashes(product_ids):
+    """productId -> stored contentHash for the given ids"""
+    hashes = {}
+    request = {'Products': {
+        'Keys': [{'productId': pid} for pid in product_ids],
+        'ProjectionExpression': 'productId, contentHash'
+    }}
+    for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response['Responses'].get('Products', []):
+            hashes[item['productId']] = item.get('contentHash')
+        request = response.get('UnprocessedKeys')
+        if not request:
+            return hashes
+        time.sleep(min(0.05 * 2 ** attempt, 1))
+    raise RuntimeError(f'Unprocessed keys after {MAX_UNPROCESSED_RETRIES} retries')
+
+def write_items(items):
+    """batch_write_item in chunks of 25, retrying UnprocessedItems; returns ids that still failed"""
+    failed = []
+    for i in range(0, len(items), WRITE_BATCH):
+        request = {'Products': [{'PutRequest': {'Item': item}} for item in items[i:i + WRITE_BATCH]]}
+        for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+            response = dynamodb.batch_write_item(RequestItems=request)
+            request = response.get('UnprocessedItems')
+            if not request:
+                break
+            time.sleep(min(0.05 * 2 ** attempt, 1))
+        else:
+            failed.extend(r['PutRequest']['Item']['productId'] for r in request['Products'])
+    return failed
+
+def flush(buffer, results):
+    """Write the buffered rows that are new or changed and record a result per row"""
+    hashes = existing_hashes(list(buffer))
+    changed = []
+    for product_id, (row_number, item) in buffer.items():
+        if product_id not in hashes:
+            status = 'created'
+        elif hashes[product_id] == item['contentHash']:
+            results.append({'row': row_number, 'productId': product_id, 'status': 'unchanged'})
+            continue
+        else:
+            status = 'updated'
+        changed.append((row_number, item, status))
+
+    failed = set(write_items([item for _, item, _ in changed]))
+    for row_number, item, status in changed:
+        if item['productId'] in failed:
+            results.append({'row': row_number, 'productId': item['productId'], 'status': 'failed',
+                            'error': 'Write throttled, retry the import'})
+        else:
+            results.append({'row': row_number, 'productId': item['productId'], 'status': status})
+            cache.invalidate(item['productId'])
+    buffer.clear()
+
+def import_rows(rows):
+    """Validate and write rows in a single streaming pass; returns one result per row"""
+    results = []
+    buffer = {}
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            item = validate_product(row)
+        except ValueError as e:
+            results.append({'row': row_number, 'status': 'invalid', 'error': str(e)})
+            continue
+
+        # Last occurrence of a productId in the same import wins
+        if item['productId'] in buffer:
+            previous_row, _ = buffer.pop(item['productId'])
+            results.append({'row': previous_row, 'productId': item['productId'], 'status': 'superseded'})
+        buffer[item['productId']] = (row_number, item)
+        if len(buffer) >= READ_BATCH:
+            flush(buffer, results)
+
+    if buffer:
+        flush(buffer, results)
+    results.sort(key=lambda result: result['row'])
+    return results
+
+def lambda_handler(event, context):
+    try:
+        # API Gateway sends the request in 'body'; direct invocations pass the payload itself
+        payload = request_body(event) if 'body' in event else event
+
+        if isinstance(payload, list):
+            rows = payload
+        elif isinstance(payload, dict) and payload.get('bucket') and payload.get('key'):
+            rows = iter_s3_rows(payload['bucket'], payload['key'])
+        else:
+            return error(400, 'Expected a JSON array of products or {"bucket": ..., "key": ...}')
+
+        results = import_rows(rows)
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+
+        return respond(200, {
+            'message': 'Import finished',
+            'rows': len(results),
+            'summary': summary,
+            'results': results
+        }, event)
+    except Exception as e:
+        return error(500, str(e))
@@ -1,37 +1,92 @@
 import json
+import os
+import uuid
 import boto3
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
+from chunk_reader import ChunkReader
+from product_paging import BadRequest, decode_cursor, encode_cursor, page_body, parse_limit, projection
+from product_response import dumps, error, respond
+
+TABLE_NAME = 'Products'
 dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('Products')
+table = dynamodb.Table(TABLE_NAME)
+
+# Admin exports: one NDJSON object per scan segment under s3://EXPORT_BUCKET/exports/<id>/
+EXPORT_BUCKET = os.environ.get('EXPORT_BUCKET')
+DEFAULT_SEGMENTS = 4
+MAX_SEGMENTS = 32
+
+def scan_page(limit, cursor=None, fields=None):
+    """Up to `limit` items and the key to continue from, following DynamoDB's 1 MB pages as needed"""
+    kwargs = projection(fields)
+    start_key = decode_cursor(cursor) if cursor else None
+    if start_key and 'shards' in start_key:
+        raise BadRequest('Invalid cursor')
+    items = []
+    while len(items) < limit:
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = table.scan(Limit=limit - len(items), **kwargs)
+        items.extend(response['Items'])
+        start_key = response.get('LastEvaluatedKey')
+        if not start_key:
+            break
+    return items, start_key
+
+def iter_segment(segment_table, segment, total_segments, fields, counter):
+    """NDJSON lines for every item in one parallel scan segment"""
+    kwargs = dict(projection(fields), Segment=segment, TotalSegments=total_segments)
+    while True:
+        response = segment_table.scan(**kwargs)
+        for item in response['Items']:
+            counter[segment] += 1
+            yield dumps(item) + '\n'
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def export_products(total_segments, fields=None):
+    """Parallel segmented scan streamed to S3, one NDJSON object per segment"""
+    s3 = boto3.client('s3')
+    export_id = str(uuid.uuid4())
+    counter = [0] * total_segments
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+    def upload(segment):
+        # boto3 resources are not thread-safe, so each segment scans through its own session's table
+        segment_table = boto3.session.Session().resource('dynamodb').Table(TABLE_NAME)
+        key = f'exports/{export_id}/segment-{segment:04d}.ndjson'
+        s3.upload_fileobj(ChunkReader(iter_segment(segment_table, segment, total_segments, fields, counter)),
+                          EXPORT_BUCKET, key, ExtraArgs={'ContentType': 'application/x-ndjson'})
+        return key
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        keys = list(executor.map(upload, range(total_segments)))
+
+    return {
+        'exportId': export_id,
+        'bucket': EXPORT_BUCKET,
+        'objects': keys,
+        'count': sum(counter)
+    }
 
 def lambda_handler(event, context):
     try:
-        response = table.scan()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'products': response['Items'],
-                'count': len(response['Items'])
-            }, cls=DecimalEncoder)
-        }
+        params = event.get('queryStringParameters') or {}
+        fields = params.get('fields')
+
+        if params.get('export') == 'true':
+            if not EXPORT_BUCKET:
+                raise BadRequest('Exports are not enabled (EXPORT_BUCKET is not set)')
+            segments = parse_limit(params.get('segments'), DEFAULT_SEGMENTS, MAX_SEGMENTS)
+            body = json.dumps(export_products(segments, fields))
+        else:
+            limit = parse_limit(params.get('limit'))
+            items, last_key = scan_page(limit, params.get('cursor'), fields)
+            body = page_body(items, encode_cursor(last_key))
+
+        return respond(200, body, event)
+    except BadRequest as e:
+        return error(400, str(e))
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error(500, str(e))
@@ -0,0 +1,217 @@
+"""
+Read-through cache for Products lookups
+Packaged next to get_product.py and add_product.py in their deployment zips
+
+Lookups go to an in-container LRU first, then an optional shared
+Redis-compatible tier (PRODUCT_CACHE_URL), then DynamoDB. Misses are
+cached too, for a shorter time, so repeated 404s stay cheap.
+
+invalidate() only reaches this container's LRU and the shared tier, so other
+containers can serve a product for up to LOCAL_TTL seconds after a write.
+That TTL is the staleness bound: it defaults to 5 seconds when there is no
+shared tier to absorb the extra misses, and 30 seconds when there is.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+TABLE_NAME = 'Products'
+SHARED_URL = os.environ.get('PRODUCT_CACHE_URL')
+LOCAL_MAX_ITEMS = int(os.environ.get('PRODUCT_CACHE_SIZE', '1024'))
+# Longest time another container's LRU serves a product after it is written
+LOCAL_TTL = int(os.environ.get('PRODUCT_CACHE_TTL', '30' if SHARED_URL else '5'))
+SHARED_TTL = int(os.environ.get('PRODUCT_CACHE_SHARED_TTL', '300'))
+# A cached 404 hides a newly added product just as long, so it never outlives LOCAL_TTL by default
+NEGATIVE_TTL = int(os.environ.get('PRODUCT_CACHE_NEGATIVE_TTL', str(min(10, LOCAL_TTL))))
+
+# batch_get_item accepts at most 100 keys per call
+MAX_BATCH_KEYS = 100
+MAX_UNPROCESSED_RETRIES = 5
+
+# Cached marker for "no such product"
+MISSING = object()
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+class LruCache:
+    """Thread-safe LRU with a per-entry expiry"""
+
+    def __init__(self, max_items=LOCAL_MAX_ITEMS):
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+class LocalSharedCache:
+    """In-process stand-in for the Redis get/setex/delete calls (PRODUCT_CACHE_URL=local://)"""
+
+    def __init__(self):
+        self._cache = LruCache(max_items=100000)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def setex(self, key, ttl, value):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, *keys):
+        for key in keys:
+            self._cache.delete(key)
+
+def connect_shared(url=SHARED_URL):
+    """Shared tier client for a redis:// (or local://) URL, or None when not configured"""
+    if not url:
+        return None
+    if url.startswith('local://'):
+        return LocalSharedCache()
+    if redis is None:
+        print("PRODUCT_CACHE_URL is set but the redis package is not installed; using the local cache only")
+        return None
+    return redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.2)
+
+def _shared_key(product_id):
+    return f'product:{product_id}'
+
+def _dump(item):
+    """Shared tier encoding: DynamoDB attribute JSON keeps Decimals exact"""
+    if item is MISSING:
+        return '{}'
+    return json.dumps({key: _serializer.serialize(value) for key, value in item.items()})
+
+def _load(raw):
+    data = json.loads(raw)
+    if not data:
+        return MISSING
+    return {key: _deserializer.deserialize(value) for key, value in data.items()}
+
+class ProductCache:
+    """Read-through product lookups over DynamoDB with local and shared cache tiers"""
+
+    def __init__(self, dynamodb, table_name=TABLE_NAME, local=None, shared=None):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+        self.local = local if local is not None else LruCache()
+        self.shared = shared
+
+    def _shared_get_many(self, product_ids):
+        if self.shared is None or not product_ids:
+            return {}
+        try:
+            if hasattr(self.shared, 'mget'):
+                raws = self.shared.mget([_shared_key(pid) for pid in product_ids])
+            else:
+                raws = [self.shared.get(_shared_key(pid)) for pid in product_ids]
+        except Exception as e:
+            print(f"Shared product cache unavailable: {str(e)}")
+            return {}
+        return {pid: _load(raw) for pid, raw in zip(product_ids, raws) if raw is not None}
+
+    def _remember(self, product_id, item, shared=True):
+        ttl = NEGATIVE_TTL if item is MISSING else LOCAL_TTL
+        self.local.set(product_id, item, ttl)
+        if shared and self.shared is not None:
+            try:
+                self.shared.setex(_shared_key(product_id), NEGATIVE_TTL if item is MISSING else SHARED_TTL, _dump(item))
+            except Exception as e:
+                print(f"Shared product cache unavailable: {str(e)}")
+
+    def get(self, product_id):
+        """Product item, or None if it does not exist"""
+        return self.get_many([product_id]).get(product_id)
+
+    def get_many(self, product_ids):
+        """Product items by id (missing ids are left out), reading DynamoDB only for cache misses"""
+        found = {}
+        pending = []
+        for product_id in dict.fromkeys(product_ids):
+            value = self.local.get(product_id)
+            if value is None:
+                pending.append(product_id)
+            elif value is not MISSING:
+                found[product_id] = value
+
+        shared_hits = self._shared_get_many(pending)
+        for product_id, value in shared_hits.items():
+            self._remember(product_id, value, shared=False)
+            if value is not MISSING:
+                found[product_id] = value
+        pending = [pid for pid in pending if pid not in shared_hits]
+
+        if len(pending) == 1:
+            item = self.table.get_item(Key={'productId': pending[0]}).get('Item')
+            self._remember(pending[0], item if item is not None else MISSING)
+            if item is not None:
+                found[pending[0]] = item
+        elif pending:
+            items = self._batch_get(pending)
+            for product_id in pending:
+                item = items.get(product_id)
+                self._remember(product_id, item if item is not None else MISSING)
+                if item is not None:
+                    found[product_id] = item
+
+        return found
+
+    def _batch_get(self, product_ids):
+        """batch_get_item in chunks of 100 keys, retrying UnprocessedKeys with backoff"""
+        items = {}
+        for i in range(0, len(product_ids), MAX_BATCH_KEYS):
+            request = {self.table_name: {'Keys': [{'productId': pid} for pid in product_ids[i:i + MAX_BATCH_KEYS]]}}
+            for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(self.table_name, []):
+                    items[item['productId']] = item
+                request = response.get('UnprocessedKeys')
+                if not request:
+                    break
+                time.sleep(min(0.05 * 2 ** attempt, 1))
+            else:
+                raise RuntimeError(f'Unprocessed keys after {MAX_UNPROCESSED_RETRIES} retries')
+        return items
+
+    def invalidate(self, product_id):
+        """Drop a product from this container's LRU and the shared tier after it is written
+
+        Other containers' LRUs are not reached; they expire the entry within LOCAL_TTL.
+        """
+        self.local.delete(product_id)
+        if self.shared is not None:
+            try:
+                self.shared.delete(_shared_key(product_id))
+            except Exception as e:
+                print(f"Shared product cache unavailable: {str(e)}")
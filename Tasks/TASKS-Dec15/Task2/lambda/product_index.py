@@ -0,0 +1,209 @@
+"""
+Search indexes for the Products table
+Packaged with add_product.py, import_products.py and search_products.py
+
+Products carry a few derived attributes that back three GSIs:
+
+    name-index                entityType (S)  / nameLower (S)   name prefix
+    price-index               entityType (S)  / price (N)       price range
+    category-key-price-index  categoryKey (S) / price (N)       category, optionally with a price range
+
+entityType is written as PRODUCT#<n>, a shard picked from a hash of the
+productId, so name and price searches spread over INDEX_SHARDS partitions
+instead of one hot one. Those searches query every shard in parallel and
+merge the results in sort-key order. Category searches query one partition
+of categoryKey, the lower-cased category; the product's own category is never
+rewritten. Any remaining condition is applied as a server-side FilterExpression.
+"""
+
+import heapq
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from decimal import Decimal, InvalidOperation
+
+ENTITY_TYPE = 'PRODUCT'
+# Must match across every function that writes or searches; run the backfill after changing it
+INDEX_SHARDS = int(os.environ.get('PRODUCT_INDEX_SHARDS', '8'))
+
+NAME_INDEX = 'name-index'
+PRICE_INDEX = 'price-index'
+CATEGORY_INDEX = 'category-key-price-index'
+
+class SearchError(ValueError):
+    pass
+
+def index_attributes(item):
+    """Derived attributes that put a product into the search indexes"""
+    attributes = {
+        'entityType': shard_key(index_shard(item['productId'])),
+        'nameLower': item['name'].strip().lower()
+    }
+    if item.get('category'):
+        attributes['categoryKey'] = item['category'].strip().lower()
+    return attributes
+
+def index_shard(product_id):
+    """Stable shard number for a product (crc32, so every container agrees)"""
+    return zlib.crc32(product_id.encode()) % INDEX_SHARDS
+
+def shard_key(shard):
+    return f'{ENTITY_TYPE}#{shard}'
+
+def _price(value, name):
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise SearchError(f"Invalid {name} '{value}'")
+    if not price.is_finite():
+        raise SearchError(f"Invalid {name} '{value}'")
+    return price
+
+def _price_condition(attribute, min_price, max_price):
+    if min_price is not None and max_price is not None:
+        return attribute.between(min_price, max_price)
+    if min_price is not None:
+        return attribute.gte(min_price)
+    if max_price is not None:
+        return attribute.lte(max_price)
+    return None
+
+def build_query(params):
+    """Query kwargs (IndexName, KeyConditionExpression, FilterExpression) for search parameters"""
+    prefix = (params.get('name') or '').strip().lower()
+    category = (params.get('category') or '').strip().lower()
+    min_price = _price(params['minPrice'], 'minPrice') if params.get('minPrice') else None
+    max_price = _price(params['maxPrice'], 'maxPrice') if params.get('maxPrice') else None
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise SearchError('minPrice must not be greater than maxPrice')
+
+    filters = []
+    if category:
+        # Category is the most selective key; price narrows the range key, name is filtered
+        index = CATEGORY_INDEX
+        key_condition = Key('categoryKey').eq(category)
+        price_key = _price_condition(Key('price'), min_price, max_price)
+        if price_key is not None:
+            key_condition = key_condition & price_key
+        if prefix:
+            filters.append(Attr('nameLower').begins_with(prefix))
+    elif prefix:
+        # Sharded indexes: the partition condition is added per shard by query_page
+        index = NAME_INDEX
+        key_condition = Key('nameLower').begins_with(prefix)
+        price_filter = _price_condition(Attr('price'), min_price, max_price)
+        if price_filter is not None:
+            filters.append(price_filter)
+    elif min_price is not None or max_price is not None:
+        index = PRICE_INDEX
+        key_condition = _price_condition(Key('price'), min_price, max_price)
+    else:
+        raise SearchError('Provide name, category, minPrice or maxPrice')
+
+    kwargs = {'IndexName': index, 'KeyConditionExpression': key_condition}
+    if filters:
+        condition = filters[0]
+        for extra in filters[1:]:
+            condition = condition & extra
+        kwargs['FilterExpression'] = condition
+    return kwargs
+
+# Sort key of each sharded index, used to merge the shards and to rebuild their start keys
+SHARDED_SORT_KEYS = {NAME_INDEX: 'nameLower', PRICE_INDEX: 'price'}
+
+def _query_partition(table, kwargs, limit, start_key=None):
+    """Up to `limit` matching items from one partition and the key to continue from"""
+    kwargs = dict(kwargs)
+    items = []
+    while len(items) < limit:
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        # With a filter DynamoDB may return fewer items than Limit; keep reading until the page is full
+        response = table.query(Limit=limit - len(items), **kwargs)
+        items.extend(response['Items'])
+        start_key = response.get('LastEvaluatedKey')
+        if not start_key:
+            break
+    return items, start_key
+
+def _with_attributes(projection, names):
+    """Projection that also returns `names`, and the ones the caller did not ask for"""
+    if not projection:
+        return projection, []
+    placeholders = dict(projection['ExpressionAttributeNames'])
+    extra = [name for name in names if name not in placeholders.values()]
+    for i, name in enumerate(extra):
+        placeholders[f'#k{i}'] = name
+    return {'ProjectionExpression': ', '.join(placeholders), 'ExpressionAttributeNames': placeholders}, extra
+
+# Shard queries run on a pool that lives as long as the container. boto3 resources are not
+# thread-safe, so each pool thread queries through a Table from its own session.
+_shard_pool = ThreadPoolExecutor(max_workers=INDEX_SHARDS)
+_thread_state = threading.local()
+
+def _thread_table(table):
+    """This thread's own Table object for the same table and region"""
+    tables = getattr(_thread_state, 'tables', None)
+    if tables is None:
+        tables = _thread_state.tables = {}
+    region = table.meta.client.meta.region_name
+    key = (table.name, region)
+    if key not in tables:
+        tables[key] = boto3.session.Session().resource('dynamodb', region_name=region).Table(table.name)
+    return tables[key]
+
+def query_page(table, query, limit, start_key=None, projection=None):
+    """Up to `limit` matching items and the key (or per-shard keys) to continue from"""
+    sort_key = SHARDED_SORT_KEYS.get(query['IndexName'])
+    if sort_key is None:
+        if start_key and 'shards' in start_key:
+            raise SearchError('Cursor does not match this search')
+        return _query_partition(table, dict(query, **(projection or {})), limit, start_key)
+
+    if start_key and 'shards' not in start_key:
+        raise SearchError('Cursor does not match this search')
+    # Shards still to read -> where to resume (None: from the start)
+    shards = ({int(shard): key for shard, key in start_key['shards'].items()} if start_key
+              else dict.fromkeys(range(INDEX_SHARDS)))
+    projection, extra = _with_attributes(projection, ['entityType', sort_key])
+
+    def read_shard(shard):
+        kwargs = dict(query, **(projection or {}))
+        kwargs['KeyConditionExpression'] = Key('entityType').eq(shard_key(shard)) & query['KeyConditionExpression']
+        return _query_partition(_thread_table(table), kwargs, limit, shards[shard])
+
+    order = sorted(shards)
+    pages = dict(zip(order, _shard_pool.map(read_shard, order)))
+
+    # Every shard is sorted by the index key, so a k-way merge gives the global order
+    merged = heapq.merge(*[[(item[sort_key], shard, item) for item in pages[shard][0]] for shard in order],
+                         key=lambda entry: entry[0])
+    items = []
+    consumed = dict.fromkeys(order, 0)
+    for _, shard, item in merged:
+        if len(items) == limit:
+            break
+        items.append(item)
+        consumed[shard] += 1
+
+    remaining = {}
+    for shard in order:
+        shard_items, shard_last_key = pages[shard]
+        if consumed[shard] == len(shard_items):
+            if shard_last_key:
+                remaining[shard] = shard_last_key
+        elif consumed[shard]:
+            last = shard_items[consumed[shard] - 1]
+            remaining[shard] = {'productId': last['productId'], 'entityType': last['entityType'],
+                                sort_key: last[sort_key]}
+        else:
+            remaining[shard] = shards[shard]
+
+    for item in items:
+        for name in extra:
+            item.pop(name, None)
+    return items, ({'shards': {str(shard): key for shard, key in remaining.items()}} if remaining else None)
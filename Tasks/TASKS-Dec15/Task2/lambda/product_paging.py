@@ -0,0 +1,67 @@
+"""
+Request parsing and paging helpers shared by the Products read handlers
+Packaged with list_products.py and search_products.py
+"""
+
+import base64
+import json
+from decimal import Decimal
+
+from product_response import dumps
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+class BadRequest(Exception):
+    pass
+
+def encode_cursor(last_evaluated_key):
+    """Opaque next-page token wrapping DynamoDB's LastEvaluatedKey (or a per-shard map of them)"""
+    if not last_evaluated_key:
+        return None
+    raw = dumps(last_evaluated_key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _is_key(value):
+    return isinstance(value, dict) and isinstance(value.get('productId'), str)
+
+def decode_cursor(token):
+    """ExclusiveStartKey (or {'shards': {shard: key or None}}) from a next-page token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        # Index keys may include numbers (e.g. price), which boto3 only accepts as Decimal
+        key = json.loads(raw, parse_float=Decimal, parse_int=Decimal)
+    except (ValueError, TypeError):
+        raise BadRequest('Invalid cursor')
+    if _is_key(key):
+        return key
+    shards = key.get('shards') if isinstance(key, dict) else None
+    if isinstance(shards, dict) and shards and all(v is None or _is_key(v) for v in shards.values()):
+        return key
+    raise BadRequest('Invalid cursor')
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest(f"Invalid limit '{value}'")
+    if limit < 1:
+        raise BadRequest('limit must be at least 1')
+    return min(limit, maximum)
+
+def projection(fields):
+    """ProjectionExpression kwargs for a comma separated field list (productId is always returned)"""
+    if not fields:
+        return {}
+    names = ['productId'] + [f.strip() for f in fields.split(',') if f.strip() and f.strip() != 'productId']
+    placeholders = {f'#f{i}': name for i, name in enumerate(names)}
+    return {
+        'ProjectionExpression': ', '.join(placeholders),
+        'ExpressionAttributeNames': placeholders
+    }
+
+def page_body(items, next_token):
+    """Page body, encoded in a single pass"""
+    return dumps({'products': items, 'count': len(items), 'nextToken': next_token})
@@ -0,0 +1,100 @@
+"""
+Shared API Gateway responses for the Products lambdas
+Packaged next to every handler in its deployment zip
+
+DynamoDB returns every number as a Decimal, and both encoders write its str()
+digits unchanged. orjson (a declared dependency in requirements.txt, bundled
+into every zip) takes each Decimal as an orjson.Fragment of that text. The
+json module fallback, used only where orjson is not installed (e.g. local
+runs), encodes a marked string for each Decimal and unquotes them in one
+pass over the finished body.
+"""
+
+import base64
+import gzip
+import json
+import os
+from decimal import Decimal
+
+try:
+    import orjson
+    if not hasattr(orjson, 'Fragment'):
+        orjson = None
+except ImportError:
+    orjson = None
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+GZIP_HEADERS = dict(HEADERS, **{'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'})
+
+# Bodies at least this large are gzipped for clients that accept it (0 disables)
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '8192'))
+
+def _orjson_default(value):
+    if type(value) is Decimal:
+        return orjson.Fragment(str(value))
+    if type(value) is set:
+        # DynamoDB string/number sets
+        return sorted(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+# The fallback writes each Decimal as a string wrapped in these marks, then strips the quotes and
+# marks. Lone surrogates never occur in DynamoDB strings (they are valid UTF-8) and json escapes
+# them as \udfff / \udffe. A backslash from user text is always doubled, so '"\udfff' and
+# '\udffe\udffe"' (the second escape follows a letter, not a backslash) only come from a Decimal.
+_DECIMAL_OPEN = '\udfff'
+_DECIMAL_CLOSE = '\udffe\udffe'
+
+def _json_default(value):
+    if type(value) is Decimal:
+        return _DECIMAL_OPEN + str(value) + _DECIMAL_CLOSE
+    if type(value) is set:
+        return sorted(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+_json_encoder = json.JSONEncoder(default=_json_default, separators=(',', ':'))
+
+def dumps(value):
+    """JSON text for DynamoDB data, writing every Decimal's digits exactly"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_orjson_default).decode()
+    return _json_encoder.encode(value).replace('"\\udfff', '').replace('\\udffe\\udffe"', '')
+
+def request_body(event):
+    """Decoded JSON request body (API Gateway base64-encodes it when binary media types are enabled)"""
+    body = event['body']
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    return json.loads(body)
+
+def accepts_gzip(event):
+    headers = (event or {}).get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == 'accept-encoding':
+            return 'gzip' in (value or '').lower()
+    return False
+
+def respond(status_code, body, event=None):
+    """API Gateway proxy response; body may be a str (already JSON) or data to encode"""
+    text = body if isinstance(body, str) else dumps(body)
+    if GZIP_MIN_BYTES and len(text) >= GZIP_MIN_BYTES and accepts_gzip(event):
+        return {
+            'statusCode': status_code,
+            'headers': GZIP_HEADERS,
+            'isBase64Encoded': True,
+            'body': base64.b64encode(gzip.compress(text.encode(), compresslevel=5)).decode()
+        }
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': text
+    }
+
+def error(status_code, message):
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps({'error': message})
+    }
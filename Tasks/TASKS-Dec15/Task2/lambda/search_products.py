@@ -0,0 +1,70 @@
+import json
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+from product_index import SearchError, build_query, index_attributes, query_page
+from product_paging import BadRequest, decode_cursor, encode_cursor, page_body, parse_limit, projection
+from product_response import error, respond
+
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table('Products')
+
+def backfill():
+    """Add or refresh the search attributes (e.g. after PRODUCT_INDEX_SHARDS changes)
+
+    Only the index attributes are SET, and only while name and category still hold the
+    scanned values; a product written since the scan already carries fresh ones.
+    """
+    updated = 0
+    kwargs = {}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response['Items']:
+            attributes = index_attributes(item)
+            if all(item.get(key) == value for key, value in attributes.items()):
+                continue
+            if refresh_index_attributes(item, attributes):
+                updated += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return updated
+
+def refresh_index_attributes(item, attributes):
+    """SET the index attributes on one product; False if it changed or was deleted since the scan"""
+    condition = Attr('productId').exists() & Attr('name').eq(item['name'])
+    if 'category' in item:
+        condition = condition & Attr('category').eq(item['category'])
+    else:
+        condition = condition & Attr('category').not_exists()
+    names = {f'#a{i}': key for i, key in enumerate(attributes)}
+    try:
+        table.update_item(
+            Key={'productId': item['productId']},
+            UpdateExpression='SET ' + ', '.join(f'{name} = :a{name[2:]}' for name in names),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={f':a{i}': value for i, value in enumerate(attributes.values())},
+            ConditionExpression=condition
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+def lambda_handler(event, context):
+    try:
+        # Direct invocation: {"action": "backfill"}
+        if event.get('action') == 'backfill':
+            return {'statusCode': 200, 'body': json.dumps({'updated': backfill()})}
+
+        params = event.get('queryStringParameters') or {}
+        query = build_query(params)
+        limit = parse_limit(params.get('limit'))
+        start_key = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+        items, last_key = query_page(table, query, limit, start_key, projection(params.get('fields')))
+
+        return respond(200, page_body(items, encode_cursor(last_key)), event)
+    except (BadRequest, SearchError) as e:
+        return error(400, str(e))
+    except Exception as e:
+        return error(500, str(e))
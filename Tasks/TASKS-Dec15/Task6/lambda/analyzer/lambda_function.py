@@ -1,18 +1,22 @@
 import boto3
 import json
+import logging
 from datetime import datetime, timedelta
 
 dynamodb = boto3.resource('dynamodb')
 bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
 sns = boto3.client('sns')
 
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
 TABLE_NAME = 'aws-inventory'
 SNS_TOPIC_ARN = 'arn:aws:sns:us-east-1:860839673297:inventory-alerts'
 MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
 
 def lambda_handler(event, context):
     """AI-powered inventory analysis"""
-    print("Starting AI analysis...")
+    logger.info("Starting AI analysis...")
     
     # Get recent inventory
     inventory = get_recent_inventory()
@@ -20,13 +24,13 @@ def lambda_handler(event, context):
     if not inventory:
         return {'statusCode': 200, 'body': 'No inventory data found'}
     
-    # Analyze with AI
-    analysis = analyze_with_bedrock(inventory)
+    # Analyze with AI, forwarding each completed line to the logs as it streams in
+    analysis = analyze_with_bedrock(inventory, on_text=LineForwarder(logger.info))
     
     # Always send alert with analysis results
     send_alert(analysis, inventory)
     
-    print(f"Analysis complete for {len(inventory)} resources")
+    logger.info(f"Analysis complete for {len(inventory)} resources")
     
     return {
         'statusCode': 200,
@@ -50,11 +54,11 @@ def get_recent_inventory():
         )
         return response.get('Items', [])
     except Exception as e:
-        print(f"Error getting inventory: {e}")
+        logger.error(f"Error getting inventory: {e}")
         return []
 
-def analyze_with_bedrock(inventory):
-    """Use Bedrock for AI analysis"""
+def analyze_with_bedrock(inventory, on_text=None):
+    """Use Bedrock for AI analysis, passing each streamed text delta to on_text"""
     
     summary = generate_summary(inventory)
     
@@ -71,7 +75,7 @@ Inventory Summary:
 Be concise and prioritize by impact."""
 
     try:
-        response = bedrock.invoke_model(
+        response = bedrock.invoke_model_with_response_stream(
             modelId=MODEL_ID,
             body=json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
@@ -83,13 +87,52 @@ Be concise and prioritize by impact."""
             })
         )
         
-        result = json.loads(response['body'].read())
-        return result['content'][0]['text']
+        parts = []
+        for text in stream_text(response['body']):
+            parts.append(text)
+            if on_text:
+                on_text(text)
+        if on_text and hasattr(on_text, 'flush'):
+            on_text.flush()
+        
+        if not parts:
+            return generate_fallback_analysis(summary)
+        return ''.join(parts)
     
     except Exception as e:
-        print(f"Bedrock error: {e}")
+        logger.error(f"Bedrock error: {e}")
         return generate_fallback_analysis(summary)
 
+def stream_text(stream):
+    """Yield text deltas from a Bedrock response stream (any iterable of events)"""
+    for event in stream:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = json.loads(chunk['bytes'])
+        if payload.get('type') == 'content_block_delta':
+            text = payload.get('delta', {}).get('text')
+            if text:
+                yield text
+
+class LineForwarder:
+    """Buffer streamed text and forward it one complete line at a time"""
+    
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = ''
+    
+    def __call__(self, text):
+        lines = (self.pending + text).split('\n')
+        self.pending = lines.pop()
+        for line in lines:
+            self.sink(line)
+    
+    def flush(self):
+        if self.pending:
+            self.sink(self.pending)
+            self.pending = ''
+
 def generate_summary(inventory):
     """Generate inventory summary"""
     summary = {
@@ -174,6 +217,6 @@ Scan Date: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}
             Subject=subject,
             Message=message
         )
-        print("Alert sent successfully")
+        logger.info("Alert sent successfully")
     except Exception as e:
-        print(f"Error sending alert: {e}")
+        logger.error(f"Error sending alert: {e}")
@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Clients are created at import time; no AWS calls are made in these tests
+sys.modules.setdefault('boto3', mock.MagicMock())
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import lambda_function
+from lambda_function import LineForwarder, stream_text
+
+def delta(text):
+    """Stream event carrying one content_block_delta, as Bedrock sends it"""
+    payload = {'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}}
+    return {'chunk': {'bytes': json.dumps(payload).encode()}}
+
+def forward(chunks):
+    lines = []
+    forwarder = LineForwarder(lines.append)
+    for chunk in chunks:
+        forwarder(chunk)
+    return forwarder, lines
+
+def test_lines_split_across_chunks():
+    """Lines are forwarded only once complete, however the text is chunked"""
+    forwarder, lines = forward(['1. Stop id', 'le EC2\n2. Enable ', 'lifecycle\n'])
+    assert lines == ['1. Stop idle EC2', '2. Enable lifecycle']
+    forwarder.flush()
+    assert lines == ['1. Stop idle EC2', '2. Enable lifecycle']
+
+def test_several_lines_in_one_chunk():
+    forwarder, lines = forward(['a\nb\n\nc'])
+    assert lines == ['a', 'b', '']
+    assert forwarder.pending == 'c'
+
+def test_trailing_partial_line_flushed():
+    """The last line without a newline is held until flush"""
+    forwarder, lines = forward(['first\nsec', 'ond'])
+    assert lines == ['first']
+    forwarder.flush()
+    assert lines == ['first', 'second']
+    forwarder.flush()
+    assert lines == ['first', 'second']
+
+def test_analysis_streams_lines(monkeypatch):
+    """analyze_with_bedrock assembles the full text and forwards every line"""
+    events = [
+        {'chunk': {'bytes': json.dumps({'type': 'message_start'}).encode()}},
+        delta('Top 3:\n1. Stop'),
+        delta(' idle EC2\n2. S3 lifecycle'),
+        delta('\n3. RDS EOL'),
+        {'chunk': {'bytes': json.dumps({'type': 'message_stop'}).encode()}}
+    ]
+    bedrock = mock.Mock()
+    bedrock.invoke_model_with_response_stream.return_value = {'body': iter(events)}
+    monkeypatch.setattr(lambda_function, 'bedrock', bedrock)
+
+    lines = []
+    analysis = lambda_function.analyze_with_bedrock([], on_text=LineForwarder(lines.append))
+    assert analysis == 'Top 3:\n1. Stop idle EC2\n2. S3 lifecycle\n3. RDS EOL'
+    assert lines == ['Top 3:', '1. Stop idle EC2', '2. S3 lifecycle', '3. RDS EOL']
+    assert ''.join(stream_text(events)) == analysis
+
+def test_empty_stream_falls_back(monkeypatch):
+    bedrock = mock.Mock()
+    bedrock.invoke_model_with_response_stream.return_value = {'body': iter([])}
+    monkeypatch.setattr(lambda_function, 'bedrock', bedrock)
+
+    analysis = lambda_function.analyze_with_bedrock([])
+    assert 'AWS Infrastructure Analysis Report' in analysis
@@ -135,6 +135,7 @@ resource "aws_iam_role_policy" "analyzer_policy" {
         Effect = "Allow"
         Action = [
           "bedrock:InvokeModel",
+          "bedrock:InvokeModelWithResponseStream",
           "dynamodb:Scan",
           "dynamodb:Query",
           "dynamodb:GetItem",
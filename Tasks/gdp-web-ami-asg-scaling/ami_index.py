@@ -0,0 +1,82 @@
+import heapq
+import os
+import re
+
+# Applications come from configuration; this default matches the original three GDP-Web servers
+DEFAULT_APPLICATIONS = ['gdp-web-1', 'gdp-web-2', 'gdp-web-3']
+
+def get_applications(event=None):
+    """Application names from the event, then the GDP_WEB_APPS env var, then the defaults"""
+    if event and event.get('applications'):
+        return list(event['applications'])
+    configured = os.environ.get('GDP_WEB_APPS', '')
+    apps = [app.strip() for app in configured.split(',') if app.strip()]
+    return apps or list(DEFAULT_APPLICATIONS)
+
+def compile_app_pattern(applications):
+    """One regex that maps an AMI name to its application (longest name wins, e.g. gdp-web-10 over gdp-web-1)"""
+    names = sorted(set(applications), key=len, reverse=True)
+    return re.compile('^(' + '|'.join(re.escape(name) for name in names) + ')-')
+
+class AmiIndex:
+    """Latest (and optionally top-K) available AMIs per application from one paginated describe_images"""
+
+    def __init__(self, applications, history=1):
+        self.applications = list(applications)
+        self.history = max(1, history)
+        self.pattern = compile_app_pattern(self.applications)
+        self._latest = {}
+        self._heaps = {app: [] for app in self.applications}
+
+    @classmethod
+    def build(cls, ec2, applications, history=1):
+        """Fetch all owned, available images for the applications once and index them"""
+        index = cls(applications, history)
+        paginator = ec2.get_paginator('describe_images')
+        pages = paginator.paginate(
+            Owners=['self'],
+            Filters=[
+                {'Name': 'name', 'Values': [f'{app}-*' for app in index.applications]},
+                {'Name': 'state', 'Values': ['available']}
+            ],
+            PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            for image in page['Images']:
+                index.add(image)
+        return index
+
+    def app_for(self, ami_name):
+        """Return the application an AMI name belongs to, or None"""
+        match = self.pattern.match(ami_name or '')
+        return match.group(1) if match else None
+
+    def add(self, image):
+        """Add one image, keeping a running max (and a bounded heap for history)"""
+        app = self.app_for(image.get('Name'))
+        if app is None:
+            return None
+
+        current = self._latest.get(app)
+        if current is None or image['CreationDate'] > current['CreationDate']:
+            self._latest[app] = image
+
+        if self.history > 1:
+            heap = self._heaps[app]
+            entry = (image['CreationDate'], image['ImageId'], image)
+            if len(heap) < self.history:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        return app
+
+    def latest(self, app):
+        """Latest available image for an application, or None"""
+        return self._latest.get(app)
+
+    def recent(self, app):
+        """Up to `history` most recent images for an application, newest first"""
+        if self.history == 1:
+            latest = self._latest.get(app)
+            return [latest] if latest else []
+        return [entry[2] for entry in sorted(self._heaps[app], key=lambda e: e[:2], reverse=True)]
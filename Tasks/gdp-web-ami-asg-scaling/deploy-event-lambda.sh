@@ -37,10 +37,33 @@ aws iam put-role-policy \
         }]
     }'
 
+# The latest-AMI view is one item per application in DynamoDB (conditional writes keep the newest AMI)
+TABLE_NAME="gdp-web-latest-ami"
+echo "Creating DynamoDB table..."
+aws dynamodb create-table \
+    --table-name $TABLE_NAME \
+    --attribute-definitions AttributeName=application,AttributeType=S \
+    --key-schema AttributeName=application,KeyType=HASH \
+    --billing-mode PAY_PER_REQUEST 2>/dev/null || echo "Table already exists"
+aws dynamodb wait table-exists --table-name $TABLE_NAME
+
+aws iam put-role-policy \
+    --role-name $ROLE_NAME \
+    --policy-name LatestAmiTable \
+    --policy-document '{
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow",
+            "Action": ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:DeleteItem",
+                       "dynamodb:BatchWriteItem", "dynamodb:Scan"],
+            "Resource": "arn:aws:dynamodb:*:*:table/gdp-web-latest-ami"
+        }]
+    }'
+
 sleep 10
 
 # Package function
-zip -q function.zip event-driven-lambda.py
+zip -q function.zip event-driven-lambda.py ami_index.py latest_ami_store.py
 
 # Get role ARN
 ACCOUNT_ID=$(aws sts get-caller-identity --query Account --output text)
@@ -63,23 +86,19 @@ aws lambda create-function \
         --zip-file fileb://function.zip
 }
 
-# Create EventBridge Rule
+# Create EventBridge Rule (fires once the AMI is available, not when CreateImage is called)
 echo "Creating EventBridge Rule..."
 aws events put-rule \
     --name gdp-web-ami-creation-rule \
-    --description "Trigger Lambda when GDP-Web AMI is created" \
+    --description "Trigger Lambda when a GDP-Web AMI becomes available" \
     --event-pattern '{
         "source": ["aws.ec2"],
-        "detail-type": ["AWS API Call via CloudTrail"],
+        "detail-type": ["EC2 AMI State Change"],
         "detail": {
-            "eventSource": ["ec2.amazonaws.com"],
-            "eventName": ["CreateImage"],
-            "responseElements": {
-                "imageId": [{"exists": true}]
-            }
+            "State": ["available"]
         }
     }' \
-    --state ENABLED 2>/dev/null || echo "Rule exists"
+    --state ENABLED
 
 # Add Lambda target to EventBridge rule
 echo "Adding Lambda target to EventBridge rule..."
@@ -98,6 +117,25 @@ aws lambda add-permission \
     --principal events.amazonaws.com \
     --source-arn "arn:aws:events:$(aws configure get region):${ACCOUNT_ID}:rule/gdp-web-ami-creation-rule" 2>/dev/null || echo "Permission exists"
 
+# Periodic reconcile of the latest-AMI view (repairs missed or out-of-order events)
+echo "Creating reconcile schedule..."
+aws events put-rule \
+    --name gdp-web-ami-reconcile-rule \
+    --description "Rebuild the GDP-Web latest-AMI view" \
+    --schedule-expression "rate(6 hours)" \
+    --state ENABLED 2>/dev/null || echo "Rule exists"
+
+aws events put-targets \
+    --rule gdp-web-ami-reconcile-rule \
+    --targets "Id"="1","Arn"="$LAMBDA_ARN" 2>/dev/null || echo "Target exists"
+
+aws lambda add-permission \
+    --function-name $FUNCTION_NAME \
+    --statement-id allow-eventbridge-reconcile \
+    --action lambda:InvokeFunction \
+    --principal events.amazonaws.com \
+    --source-arn "arn:aws:events:$(aws configure get region):${ACCOUNT_ID}:rule/gdp-web-ami-reconcile-rule" 2>/dev/null || echo "Permission exists"
+
 echo ""
 echo "✅ Event-Driven Lambda Setup Complete!"
 echo "Function: $FUNCTION_NAME"
@@ -105,6 +143,8 @@ echo "EventBridge Rule: gdp-web-ami-creation-rule"
 echo ""
 echo "Test manually with AMI ID:"
 echo "aws lambda invoke --function-name $FUNCTION_NAME --payload '{\"detail\":{\"responseElements\":{\"imageId\":\"ami-035acc1319ac2b971\"}}}' result.json"
+echo "Look up latest AMIs (no EC2 calls):"
+echo "aws lambda invoke --function-name $FUNCTION_NAME --payload '{\"action\":\"get_latest\",\"application\":\"gdp-web-1\"}' result.json"
 
 # Cleanup
 rm -f function.zip
\ No newline at end of file
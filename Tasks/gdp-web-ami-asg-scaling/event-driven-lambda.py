@@ -2,81 +2,75 @@ import boto3
 import json
 from datetime import datetime
 
+from ami_index import compile_app_pattern, get_applications
+from latest_ami_store import LatestAmiStore, image_record, reconcile
+
+# Compiled once per container; the view itself lives in DynamoDB so every container shares it
+APPLICATIONS = get_applications()
+APP_PATTERN = compile_app_pattern(APPLICATIONS)
+store = LatestAmiStore(boto3.resource('dynamodb'))
+
 def lambda_handler(event, context):
     """
-    Event-driven Lambda: Triggered when AMI backup is created
-    Returns latest AMI only for the specific application that triggered the event
+    Event-driven Lambda: Triggered when an AMI backup becomes available
+    Updates the app -> latest AMI view in O(1) and returns the latest AMI for that application.
+    Also serves lookups ({"action": "get_latest"}) from the view without EC2 calls, and
+    rebuilds it on a schedule ({"action": "reconcile"} or an EventBridge Scheduled Event).
     """
     print(f"Lambda triggered with event: {json.dumps(event)}")
-    ec2 = boto3.client('ec2')
+    
+    action = event.get('action')
+    if action == 'get_latest':
+        return get_latest(event.get('application'))
+    if action == 'reconcile' or event.get('detail-type') == 'Scheduled Event':
+        return run_reconcile()
     
     try:
-        # Extract AMI ID from EventBridge event
-        ami_id = event['detail']['responseElements']['imageId']
-        
-        # Get AMI details to identify which application it belongs to
-        response = ec2.describe_images(ImageIds=[ami_id])
+        # "EC2 AMI State Change" events carry ImageId; CloudTrail CreateImage events carry responseElements
+        detail = event['detail']
+        ami_id = detail.get('ImageId') or detail['responseElements']['imageId']
         
+        # CreateImage fires while the image is still pending, so only record what EC2 reports available
+        response = boto3.client('ec2').describe_images(ImageIds=[ami_id])
         if not response['Images']:
             return {
                 'statusCode': 404,
                 'message': 'AMI not found'
             }
-        
-        ami_info = response['Images'][0]
-        ami_name = ami_info['Name']
+        image = response['Images'][0]
+        if image['State'] != 'available':
+            return {
+                'statusCode': 202,
+                'message': f"AMI {ami_id} is {image['State']}; it is recorded when it becomes available"
+            }
+        ami_name = image['Name']
         
         # Determine which GDP-Web application this AMI belongs to
-        app_name = None
-        if ami_name.startswith('gdp-web-1-'):
-            app_name = 'gdp-web-1'
-        elif ami_name.startswith('gdp-web-2-'):
-            app_name = 'gdp-web-2'
-        elif ami_name.startswith('gdp-web-3-'):
-            app_name = 'gdp-web-3'
-        
-        if not app_name:
+        match = APP_PATTERN.match(ami_name)
+        if not match:
             return {
                 'statusCode': 400,
                 'message': f'AMI {ami_name} does not match GDP-Web naming pattern'
             }
+        app_name = match.group(1)
         
-        # Get latest AMI for this specific application
-        app_response = ec2.describe_images(
-            Owners=['self'],
-            Filters=[
-                {'Name': 'name', 'Values': [f'{app_name}-*']},
-                {'Name': 'state', 'Values': ['available']}
-            ]
-        )
+        record = image_record(image)
+        latest_ami = record if store.put_if_newer(app_name, record) else store.get(app_name)
         
-        if app_response['Images']:
-            # Sort by creation date, get latest
-            latest_ami = sorted(
-                app_response['Images'],
-                key=lambda x: x['CreationDate'],
-                reverse=True
-            )[0]
-            
-            result = {
-                'statusCode': 200,
-                'triggered_by_ami': ami_id,
-                'application': app_name,
-                'latest_ami': {
-                    'ami_id': latest_ami['ImageId'],
-                    'ami_name': latest_ami['Name'],
-                    'creation_date': latest_ami['CreationDate'],
-                    'is_new_backup': latest_ami['ImageId'] == ami_id
-                },
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }
-            print(f"Lambda result: {json.dumps(result, default=str)}")
-            return result
-        else:
-            return {
-                'statusCode': 404,
-                'message': f'No AMIs found for {app_name}'
-            }
+        result = {
+            'statusCode': 200,
+            'triggered_by_ami': ami_id,
+            'application': app_name,
+            'latest_ami': {
+                'ami_id': latest_ami['ami_id'],
+                'ami_name': latest_ami['ami_name'],
+                'creation_date': latest_ami['creation_date'],
+                'is_new_backup': latest_ami['ami_id'] == ami_id
+            },
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
+        print(f"Lambda result: {json.dumps(result, default=str)}")
+        return result
             
     except KeyError as e:
         return {
@@ -89,6 +83,31 @@ def lambda_handler(event, context):
             'message': f'Error: {str(e)}'
         }
 
+def get_latest(app_name=None):
+    """Serve latest AMIs from the view, with no EC2 API calls"""
+    if app_name:
+        latest_ami = store.get(app_name)
+        if not latest_ami:
+            return {
+                'statusCode': 404,
+                'message': f'No AMIs found for {app_name}'
+            }
+        return {'statusCode': 200, 'application': app_name, 'latest_ami': latest_ami}
+    
+    return {'statusCode': 200, 'latest_amis': store.all()}
+
+def run_reconcile():
+    """Rebuild the view from EC2 to repair missed or out-of-order events"""
+    try:
+        records = reconcile(boto3.client('ec2'), store, APPLICATIONS)
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'message': f'Reconcile failed: {str(e)}'
+        }
+    print(f"Reconciled latest AMIs for {len(records)} applications")
+    return {'statusCode': 200, 'latest_amis': records}
+
 # For manual testing with AMI ID
 def test_with_ami_id(ami_id):
     """Test function with specific AMI ID"""
@@ -0,0 +1,78 @@
+import os
+
+from boto3.dynamodb.conditions import Attr
+
+from ami_index import AmiIndex
+
+# One item per application holds its latest AMI record, shared by every container
+DEFAULT_TABLE_NAME = os.environ.get('LATEST_AMI_TABLE', 'gdp-web-latest-ami')
+
+class LatestAmiStore:
+    """Materialized view of the latest AMI per application, kept in a DynamoDB table keyed by application"""
+
+    def __init__(self, dynamodb, table_name=DEFAULT_TABLE_NAME):
+        self.table = dynamodb.Table(table_name)
+
+    def get(self, app):
+        """Latest AMI record for an application, or None"""
+        item = self.table.get_item(Key={'application': app}, ConsistentRead=True).get('Item')
+        return _record(item) if item else None
+
+    def all(self):
+        """Every application's latest AMI record"""
+        records = {}
+        kwargs = {'ConsistentRead': True}
+        while True:
+            response = self.table.scan(**kwargs)
+            for item in response['Items']:
+                records[item['application']] = _record(item)
+            if 'LastEvaluatedKey' not in response:
+                return records
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def put_if_newer(self, app, record):
+        """Store record unless a newer AMI is already recorded; True if stored
+
+        The check is part of the write, so concurrent events cannot let an older AMI win.
+        """
+        try:
+            self.table.put_item(
+                Item=dict(record, application=app),
+                ConditionExpression=(Attr('application').not_exists()
+                                     | Attr('creation_date').lt(record['creation_date'])
+                                     | Attr('ami_id').eq(record['ami_id']))
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def replace_all(self, records):
+        """Overwrite the view with a fresh snapshot (used by reconcile), dropping applications not in it"""
+        stale = set(self.all()) - set(records)
+        with self.table.batch_writer() as batch:
+            for app, record in records.items():
+                batch.put_item(Item=dict(record, application=app))
+            for app in stale:
+                batch.delete_item(Key={'application': app})
+
+def _record(item):
+    return {key: value for key, value in item.items() if key != 'application'}
+
+def image_record(image):
+    """Store record for a describe_images entry"""
+    return {
+        'ami_id': image['ImageId'],
+        'ami_name': image['Name'],
+        'creation_date': image['CreationDate']
+    }
+
+def reconcile(ec2, store, applications):
+    """Rebuild the view from one paginated describe_images call, fixing missed or out-of-order events"""
+    index = AmiIndex.build(ec2, applications)
+    records = {}
+    for app in applications:
+        latest = index.latest(app)
+        if latest:
+            records[app] = image_record(latest)
+    store.replace_all(records)
+    return records
@@ -43,7 +43,7 @@ echo "Waiting for role to be available..."
 sleep 10
 
 # Package Lambda function
-zip -q function.zip task1-lambda-latest-ami.py
+zip -q function.zip task1-lambda-latest-ami.py ami_index.py
 
 # Get account ID and create role ARN
 ACCOUNT_ID=$(aws sts get-caller-identity --query Account --output text)
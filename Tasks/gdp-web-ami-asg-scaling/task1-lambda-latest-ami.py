@@ -2,51 +2,49 @@ import boto3
 import json
 from datetime import datetime
 
+from ami_index import AmiIndex, get_applications
+
 def lambda_handler(event, context):
     """
     Task 1: Lambda function to get latest AMI for each GDP-Web application
-    Returns the most recent AMI backup for gdp-web-1, gdp-web-2, gdp-web-3
+    Returns the most recent AMI backup for every configured application
+    (GDP_WEB_APPS env var or 'applications' in the event, default gdp-web-1..3)
     """
     ec2 = boto3.client('ec2')
     
-    apps = ['gdp-web-1', 'gdp-web-2', 'gdp-web-3']
+    apps = get_applications(event)
+    history = int((event or {}).get('history', 1))
     result = {}
     
+    try:
+        # One paginated describe_images call covers every application
+        index = AmiIndex.build(ec2, apps, history=history)
+    except Exception as e:
+        return {
+            'statusCode': 200,
+            'body': {app: {'status': 'error', 'message': str(e)} for app in apps},
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
+    
     for app in apps:
-        try:
-            # Get AMIs for this application
-            response = ec2.describe_images(
-                Owners=['self'],
-                Filters=[
-                    {'Name': 'name', 'Values': [f'{app}-*']},
-                    {'Name': 'state', 'Values': ['available']}
+        latest_ami = index.latest(app)
+        
+        if latest_ami:
+            result[app] = {
+                'ami_id': latest_ami['ImageId'],
+                'name': latest_ami['Name'],
+                'creation_date': latest_ami['CreationDate'],
+                'status': 'found'
+            }
+            if history > 1:
+                result[app]['history'] = [
+                    {'ami_id': image['ImageId'], 'creation_date': image['CreationDate']}
+                    for image in index.recent(app)
                 ]
-            )
-            
-            if response['Images']:
-                # Sort by creation date, get latest
-                latest_ami = sorted(
-                    response['Images'], 
-                    key=lambda x: x['CreationDate'], 
-                    reverse=True
-                )[0]
-                
-                result[app] = {
-                    'ami_id': latest_ami['ImageId'],
-                    'name': latest_ami['Name'],
-                    'creation_date': latest_ami['CreationDate'],
-                    'status': 'found'
-                }
-            else:
-                result[app] = {
-                    'status': 'no_ami_found',
-                    'message': f'No available AMI found for {app}'
-                }
-                
-        except Exception as e:
+        else:
             result[app] = {
-                'status': 'error',
-                'message': str(e)
+                'status': 'no_ami_found',
+                'message': f'No available AMI found for {app}'
             }
     
     return {
@@ -145,11 +145,27 @@ resource "aws_lambda_function" "latest_ami" {
   runtime         = "python3.11"
   timeout         = 30
 
+  environment {
+    variables = {
+      GDP_WEB_APPS = "gdp-web-1,gdp-web-2,gdp-web-3"
+    }
+  }
+
   depends_on = [data.archive_file.lambda_zip]
 }
 
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_file = "${path.module}/lambda_function.py"
   output_path = "${path.module}/lambda_function.zip"
+
+  source {
+    content  = file("${path.module}/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  # Shared single-call AMI index
+  source {
+    content  = file("${path.module}/../ami_index.py")
+    filename = "ami_index.py"
+  }
 }
\ No newline at end of file
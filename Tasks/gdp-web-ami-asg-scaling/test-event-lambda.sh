@@ -46,7 +46,8 @@ AMI_ID=$(aws ec2 create-image \
 echo "✓ AMI Created: $AMI_ID ($AMI_NAME)"
 echo ""
 
-echo "4. Waiting 30 seconds for EventBridge to trigger Lambda..."
+echo "4. Waiting for the AMI to become available (the Lambda is triggered on that state change)..."
+aws ec2 wait image-available --image-ids $AMI_ID
 sleep 30
 
 echo "5. Checking Lambda logs for automatic trigger..."
@@ -0,0 +1,302 @@
+"""
+Multi-ASG rollout orchestrator for the GDP-Web AMI updater
+Packaged next to task2-ami-update-lambda.py in the deployment zip
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Used when neither ROLLOUT_CONFIG nor rollout-config.json is present: the original single template/ASG
+DEFAULT_CONFIG = {
+    'targets': [
+        {
+            'ami_prefix': 'gdp-web-',
+            'launch_template': 'gdp-web-asg-lt',
+            'asgs': ['gdp-web-asg-final']
+        }
+    ],
+    'waves': {
+        'parallelism': 2,
+        'min_healthy_percentage': 50,
+        'instance_warmup': 300,
+        'bake_time': 0
+    },
+    'checkpoint_table': 'gdp-web-ami-rollout'
+}
+
+REFRESH_DONE = {'Successful'}
+REFRESH_FAILED = {'Failed', 'Cancelled', 'RollbackSuccessful', 'RollbackFailed'}
+
+# Stop this long before the Lambda timeout, save the checkpoint and hand over to a fresh invocation
+TIME_MARGIN_MS = 30000
+
+def load_config():
+    """Rollout targets and wave settings from ROLLOUT_CONFIG (JSON), rollout-config.json, or the defaults"""
+    if os.environ.get('ROLLOUT_CONFIG'):
+        config = json.loads(os.environ['ROLLOUT_CONFIG'])
+    else:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rollout-config.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                config = json.load(f)
+        else:
+            config = DEFAULT_CONFIG
+
+    merged = dict(DEFAULT_CONFIG, **config)
+    merged['waves'] = dict(DEFAULT_CONFIG['waves'], **config.get('waves', {}))
+    return merged
+
+class CheckpointConflict(Exception):
+    """A newer rollout for the same AMI prefix has taken over the checkpoint"""
+
+class CheckpointStore:
+    """Rollout checkpoint for one AMI prefix, kept in a DynamoDB item (or a local file when ROLLOUT_CHECKPOINT_FILE is set)
+
+    A new rollout claims the checkpoint and supersedes any earlier one for the prefix; every
+    later save is conditional on the rollout id, so a superseded rollout stops instead of
+    overwriting the newer one's progress.
+    """
+
+    def __init__(self, table, ami_prefix, path=None):
+        self.table = table
+        self.ami_prefix = ami_prefix
+        self.path = path if path is not None else os.environ.get('ROLLOUT_CHECKPOINT_FILE')
+
+    @classmethod
+    def for_prefix(cls, dynamodb, config, ami_prefix):
+        """One checkpoint per AMI prefix, so rollouts of different targets never overwrite each other"""
+        path = os.environ.get('ROLLOUT_CHECKPOINT_FILE')
+        if path:
+            return cls(None, ami_prefix, path=f'{path}.{checkpoint_key(ami_prefix)}')
+        return cls(dynamodb.Table(config['checkpoint_table']), ami_prefix, path='')
+
+    def load(self):
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+        item = self.table.get_item(Key={'ami_prefix': self.ami_prefix}, ConsistentRead=True).get('Item')
+        # Stored as JSON text so floats (bake_until) need no Decimal conversion
+        return json.loads(item['state']) if item else None
+
+    def claim(self, state):
+        """Save a newly planned rollout, superseding any earlier rollout for the prefix"""
+        self._write(state, conditional=False)
+
+    def save(self, state):
+        """Save progress; raises CheckpointConflict if another rollout has claimed the prefix since"""
+        self._write(state, conditional=True)
+
+    def _write(self, state, conditional):
+        value = json.dumps(state)
+        if self.path:
+            # Local testing only: a plain read-compare-write, not atomic across processes
+            if conditional and (self.load() or {}).get('rollout_id') != state['rollout_id']:
+                raise CheckpointConflict(f"Rollout {state['rollout_id']} was superseded")
+            with open(self.path, 'w') as f:
+                f.write(value)
+            return
+        kwargs = {}
+        if conditional:
+            kwargs = {
+                'ConditionExpression': 'rollout_id = :rollout_id',
+                'ExpressionAttributeValues': {':rollout_id': state['rollout_id']}
+            }
+        try:
+            self.table.put_item(Item={'ami_prefix': self.ami_prefix, 'rollout_id': state['rollout_id'],
+                                      'state': value}, **kwargs)
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            raise CheckpointConflict(f"Rollout {state['rollout_id']} was superseded")
+
+def checkpoint_key(ami_prefix):
+    """File-name-safe suffix for an AMI prefix"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', ami_prefix).strip('-_.') or 'default'
+
+def targets_for_ami(config, ami_name):
+    """Targets whose AMI prefix matches the triggering AMI (longest prefix wins)"""
+    matching = [t for t in config['targets'] if ami_name.startswith(t['ami_prefix'])]
+    if not matching:
+        return []
+    longest = max(len(t['ami_prefix']) for t in matching)
+    return [t for t in matching if len(t['ami_prefix']) == longest]
+
+def latest_amis(ec2, prefixes):
+    """Latest available AMI per prefix from one paginated describe_images call (linear max-scan)"""
+    latest = {}
+    ordered = sorted(set(prefixes), key=len, reverse=True)
+    pages = ec2.get_paginator('describe_images').paginate(
+        Owners=['self'],
+        Filters=[
+            {'Name': 'name', 'Values': [f'{prefix}*' for prefix in ordered]},
+            {'Name': 'state', 'Values': ['available']}
+        ]
+    )
+    for page in pages:
+        for image in page['Images']:
+            prefix = next((p for p in ordered if image['Name'].startswith(p)), None)
+            if prefix is None:
+                continue
+            current = latest.get(prefix)
+            if current is None or image['CreationDate'] > current['CreationDate']:
+                latest[prefix] = image
+    return latest
+
+def make_waves(asgs, parallelism):
+    """Split ASGs into waves of at most `parallelism` groups"""
+    size = max(1, int(parallelism))
+    return [asgs[i:i + size] for i in range(0, len(asgs), size)]
+
+def plan_rollout(ec2, config, targets, create_version):
+    """Create launch template versions concurrently and build the wave plan"""
+    amis = latest_amis(ec2, [t['ami_prefix'] for t in targets])
+
+    jobs = [(t, amis[t['ami_prefix']]['ImageId']) for t in targets if t['ami_prefix'] in amis]
+    if not jobs:
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as executor:
+        versions = list(executor.map(lambda job: create_version(ec2, job[0]['launch_template'], job[1]), jobs))
+
+    templates = {}
+    asgs = []
+    for (target, ami_id), version in zip(jobs, versions):
+        templates[target['launch_template']] = dict(version, ami_id=ami_id)
+        if version['changed']:
+            for asg in target['asgs']:
+                asgs.append({'name': asg, 'launch_template': target['launch_template']})
+
+    return {
+        'rollout_id': str(uuid.uuid4()),
+        'ami_prefix': targets[0]['ami_prefix'],
+        'status': 'in_progress' if asgs else 'up_to_date',
+        'templates': templates,
+        'waves': make_waves(asgs, config['waves']['parallelism']),
+        'wave_index': 0,
+        'refreshes': {},
+        'bake_until': None,
+        'failed': {}
+    }
+
+def error_code(error):
+    """AWS error code of a botocore ClientError, or None for any other exception"""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+def start_refresh(autoscaling, asg, wave_settings):
+    """Point the ASG at the template's latest version and start a rolling refresh
+
+    Returns the refresh id, or None while an earlier refresh is being cancelled. That refresh
+    started before the template switch and would leave old-AMI instances in the group, so it
+    is cancelled rather than adopted; call again on the next poll to start the new one.
+    """
+    autoscaling.update_auto_scaling_group(
+        AutoScalingGroupName=asg['name'],
+        LaunchTemplate={
+            'LaunchTemplateName': asg['launch_template'],
+            'Version': '$Latest'
+        }
+    )
+    try:
+        response = autoscaling.start_instance_refresh(
+            AutoScalingGroupName=asg['name'],
+            Strategy='Rolling',
+            Preferences={
+                'InstanceWarmup': int(wave_settings['instance_warmup']),
+                'MinHealthyPercentage': int(wave_settings['min_healthy_percentage'])
+            }
+        )
+        return response['InstanceRefreshId']
+    except Exception as e:
+        if error_code(e) != 'InstanceRefreshInProgress':
+            raise
+    try:
+        autoscaling.cancel_instance_refresh(AutoScalingGroupName=asg['name'])
+        print(f"Cancelling the instance refresh already running on {asg['name']}")
+    except Exception as e:
+        # Already cancelling, or it finished in the meantime: either way retry the start next poll
+        if error_code(e) not in ('ActiveInstanceRefreshNotFound', 'InstanceRefreshInProgress'):
+            raise
+    return None
+
+def refresh_status(autoscaling, asg_name, refresh_id):
+    """Status of one instance refresh, fetched by id"""
+    response = autoscaling.describe_instance_refreshes(
+        AutoScalingGroupName=asg_name,
+        InstanceRefreshIds=[refresh_id]
+    )
+    return response['InstanceRefreshes'][0]['Status']
+
+def run_waves(autoscaling, state, wave_settings, remaining_ms, save, sleep=time.sleep):
+    """Advance the rollout wave by wave until done, failed, or out of time; returns the state"""
+    poll_interval = 15
+    while state['wave_index'] < len(state['waves']):
+        if remaining_ms() < TIME_MARGIN_MS:
+            save(state)
+            return state
+
+        wave = state['waves'][state['wave_index']]
+        for asg in wave:
+            if state['refreshes'].get(asg['name']) is None and asg['name'] not in state['failed']:
+                try:
+                    refresh_id = start_refresh(autoscaling, asg, wave_settings)
+                except Exception as e:
+                    state['failed'][asg['name']] = str(e)
+                else:
+                    if refresh_id is None:
+                        continue
+                    state['refreshes'][asg['name']] = refresh_id
+                    print(f"Started instance refresh on {asg['name']}: {refresh_id}")
+                save(state)
+
+        pending = []
+        for asg in wave:
+            name = asg['name']
+            if name in state['failed'] or state['refreshes'].get(name) == 'done':
+                continue
+            if state['refreshes'].get(name) is None:
+                # Waiting for an earlier refresh to finish cancelling
+                pending.append(name)
+                continue
+            status = refresh_status(autoscaling, name, state['refreshes'][name])
+            if status in REFRESH_DONE:
+                state['refreshes'][name] = 'done'
+            elif status in REFRESH_FAILED:
+                state['failed'][name] = f'Instance refresh {status}'
+            else:
+                pending.append(name)
+
+        if state['failed']:
+            state['status'] = 'failed'
+            save(state)
+            return state
+
+        if pending:
+            sleep(min(poll_interval, max(0, (remaining_ms() - TIME_MARGIN_MS) / 1000)))
+            poll_interval = min(poll_interval * 2, 60)
+            continue
+
+        # Wave finished: bake before moving on so problems surface before the next wave
+        if wave_settings['bake_time'] and state['wave_index'] + 1 < len(state['waves']):
+            if state['bake_until'] is None:
+                state['bake_until'] = time.time() + float(wave_settings['bake_time'])
+                save(state)
+            wait = state['bake_until'] - time.time()
+            if wait > 0:
+                sleep(min(wait, max(0, (remaining_ms() - TIME_MARGIN_MS) / 1000)))
+                continue
+
+        print(f"Wave {state['wave_index'] + 1}/{len(state['waves'])} complete: {[a['name'] for a in wave]}")
+        state['wave_index'] += 1
+        state['refreshes'] = {}
+        state['bake_until'] = None
+        poll_interval = 15
+        save(state)
+
+    state['status'] = 'completed'
+    save(state)
+    return state
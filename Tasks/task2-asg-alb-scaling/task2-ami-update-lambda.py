@@ -1,153 +1,177 @@
 import json
+import os
+import threading
+import time
 import boto3
 import logging
 
+from rollout_orchestrator import CheckpointConflict, CheckpointStore, load_config, plan_rollout, run_waves, targets_for_ami
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def lambda_handler(event, context):
-    """
-    Lambda function to update ASG Launch Template with latest AMI
-    Triggers when new GDP-Web AMI is created
-    """
-    
-    print(f"Received event: {json.dumps(event)}")
-    
-    ec2 = boto3.client('ec2')
-    autoscaling = boto3.client('autoscaling')
-    
+# Launch template name -> {'ami', 'version', 'expires'}; survives between events in a warm container
+TEMPLATE_CACHE = {}
+TEMPLATE_CACHE_TTL = int(os.environ.get('TEMPLATE_CACHE_TTL', '300'))
+_template_cache_lock = threading.Lock()
+
+def template_metadata(ec2, launch_template_name):
+    """Current AMI and version of the template's $Latest version, cached for TEMPLATE_CACHE_TTL seconds"""
+    with _template_cache_lock:
+        cached = TEMPLATE_CACHE.get(launch_template_name)
+    if cached and cached['expires'] > time.time():
+        return cached
+
+    lt_response = ec2.describe_launch_template_versions(
+        LaunchTemplateName=launch_template_name,
+        Versions=['$Latest']
+    )
+    current_version = lt_response['LaunchTemplateVersions'][0]
+    return remember_template(launch_template_name, current_version['LaunchTemplateData'].get('ImageId'),
+                             current_version['VersionNumber'])
+
+def remember_template(launch_template_name, ami_id, version):
+    """Record a template's latest AMI and version in the cache"""
+    metadata = {'ami': ami_id, 'version': version, 'expires': time.time() + TEMPLATE_CACHE_TTL}
+    with _template_cache_lock:
+        TEMPLATE_CACHE[launch_template_name] = metadata
+    return metadata
+
+def create_template_version(ec2, launch_template_name, ami_id):
+    """Create a launch template version with the new AMI and make it the default"""
+    current = template_metadata(ec2, launch_template_name)
+
+    print(f"{launch_template_name}: current AMI {current['ami']}, version {current['version']}")
+
+    if current['ami'] == ami_id:
+        print(f"{launch_template_name} already uses latest AMI")
+        return {
+            'changed': False,
+            'previous_ami': current['ami'],
+            'previous_version': current['version'],
+            'new_version': current['version']
+        }
+
     try:
-        # Extract AMI ID from EventBridge event
-        detail = event.get('detail', {})
-        ami_id = detail.get('responseElements', {}).get('imageId')
-        ami_name = detail.get('requestParameters', {}).get('name', '')
-        
-        print(f"Processing AMI: {ami_id}, Name: {ami_name}")
-        
-        # Only process GDP-Web AMIs
-        if not ami_name.startswith('gdp-web-'):
-            print(f"Skipping non-GDP-Web AMI: {ami_name}")
-            return {'statusCode': 200, 'body': 'Not a GDP-Web AMI'}
-        
-        # Get latest GDP-Web AMI (in case multiple AMIs exist)
-        response = ec2.describe_images(
-            Owners=['self'],
-            Filters=[
-                {'Name': 'name', 'Values': ['gdp-web-*']},
-                {'Name': 'state', 'Values': ['available']}
-            ]
-        )
-        
-        if not response['Images']:
-            print("No GDP-Web AMIs found")
-            return {'statusCode': 404, 'body': 'No GDP-Web AMIs found'}
-        
-        # Sort by creation date and get latest
-        latest_ami = sorted(response['Images'], key=lambda x: x['CreationDate'])[-1]
-        latest_ami_id = latest_ami['ImageId']
-        
-        print(f"Latest GDP-Web AMI: {latest_ami_id}")
-        print(f"Latest AMI Name: {latest_ami['Name']}")
-        print(f"Latest AMI Creation Date: {latest_ami['CreationDate']}")
-        
-        # Update Launch Template
-        launch_template_name = 'gdp-web-asg-lt'
-        
-        # Get current launch template
-        lt_response = ec2.describe_launch_template_versions(
-            LaunchTemplateName=launch_template_name,
-            Versions=['$Latest']
-        )
-        
-        current_version = lt_response['LaunchTemplateVersions'][0]
-        current_ami = current_version['LaunchTemplateData']['ImageId']
-        
-        print(f"Current Launch Template AMI: {current_ami}")
-        print(f"Current Launch Template Version: {current_version['VersionNumber']}")
-        
-        if current_ami == latest_ami_id:
-            print("Launch Template already uses latest AMI")
-            return {'statusCode': 200, 'body': 'Launch Template already up to date'}
-        
-        # Create new launch template version with latest AMI
+        # Only ImageId changes; every other setting (block devices, network interfaces,
+        # metadata options, user data...) is inherited from $Latest, even if it moved since we cached it
         new_version_response = ec2.create_launch_template_version(
             LaunchTemplateName=launch_template_name,
-            LaunchTemplateData={
-                'ImageId': latest_ami_id,
-                'InstanceType': current_version['LaunchTemplateData']['InstanceType'],
-                'KeyName': current_version['LaunchTemplateData']['KeyName'],
-                'SecurityGroupIds': current_version['LaunchTemplateData']['SecurityGroupIds'],
-                'IamInstanceProfile': current_version['LaunchTemplateData'].get('IamInstanceProfile', {}),
-                'UserData': current_version['LaunchTemplateData'].get('UserData', '')
-            },
-            SourceVersion='$Latest'
+            SourceVersion='$Latest',
+            VersionDescription=f'AMI update to {ami_id}',
+            LaunchTemplateData={'ImageId': ami_id}
         )
-        
+
         new_version = new_version_response['LaunchTemplateVersion']['VersionNumber']
-        print(f"Created new launch template version: {new_version}")
-        print(f"New version uses AMI: {latest_ami_id}")
-        
-        # Set new version as default
+
         ec2.modify_launch_template(
             LaunchTemplateName=launch_template_name,
             DefaultVersion=str(new_version)
         )
-        
-        print(f"Set version {new_version} as default")
-        print(f"Launch template {launch_template_name} now uses AMI {latest_ami_id}")
-        
-        # Update Auto Scaling Group to use new version
-        asg_name = "gdp-web-asg-final"
-        
-        autoscaling.update_auto_scaling_group(
-            AutoScalingGroupName=asg_name,
-            LaunchTemplate={
-                'LaunchTemplateName': launch_template_name,
-                'Version': '$Latest'
-            }
-        )
-        
-        print(f"Updated ASG {asg_name} to use latest launch template version")
-        
-        # Trigger instance refresh to replace instances with new AMI
-        refresh_response = autoscaling.start_instance_refresh(
-            AutoScalingGroupName=asg_name,
-            Strategy='Rolling',
-            Preferences={
-                'InstanceWarmup': 300,
-                'MinHealthyPercentage': 50
-            }
-        )
-        
-        refresh_id = refresh_response['InstanceRefreshId']
-        print(f"Started instance refresh: {refresh_id}")
-        
+    except Exception:
+        # The template may have changed behind the cache; describe it again next time
+        with _template_cache_lock:
+            TEMPLATE_CACHE.pop(launch_template_name, None)
+        raise
+
+    remember_template(launch_template_name, ami_id, new_version)
+
+    print(f"Launch template {launch_template_name} version {new_version} (default) now uses AMI {ami_id}")
+    return {
+        'changed': True,
+        'previous_ami': current['ami'],
+        'previous_version': current['version'],
+        'new_version': new_version
+    }
+
+def lambda_handler(event, context):
+    """
+    Lambda function to roll the latest AMIs out to every configured Launch Template / ASG
+    Triggers when new GDP-Web AMI is created; re-invokes itself to resume long rollouts
+    """
+
+    print(f"Received event: {json.dumps(event)}")
+
+    ec2 = boto3.client('ec2')
+    autoscaling = boto3.client('autoscaling')
+
+    config = load_config()
+    dynamodb = boto3.resource('dynamodb')
+
+    def remaining_ms():
+        return context.get_remaining_time_in_millis() if context else 15 * 60 * 1000
+
+    try:
+        if event.get('resume'):
+            checkpoint = CheckpointStore.for_prefix(dynamodb, config, event.get('ami_prefix', ''))
+            state = checkpoint.load()
+            if not state or state.get('rollout_id') != event.get('rollout_id') or state['status'] != 'in_progress':
+                print("No matching rollout to resume")
+                return {'statusCode': 200, 'body': 'Nothing to resume'}
+            print(f"Resuming rollout {state['rollout_id']} at wave {state['wave_index'] + 1}/{len(state['waves'])}")
+        else:
+            # Extract AMI name from EventBridge event
+            detail = event.get('detail', {})
+            ami_id = detail.get('responseElements', {}).get('imageId')
+            ami_name = detail.get('requestParameters', {}).get('name', '')
+
+            print(f"Processing AMI: {ami_id}, Name: {ami_name}")
+
+            targets = targets_for_ami(config, ami_name)
+            if not targets:
+                print(f"Skipping AMI with no rollout target: {ami_name}")
+                return {'statusCode': 200, 'body': 'Not a GDP-Web AMI'}
+
+            # Every selected target shares the longest matching prefix, which keys the checkpoint
+            checkpoint = CheckpointStore.for_prefix(dynamodb, config, targets[0]['ami_prefix'])
+            state = plan_rollout(ec2, config, targets, create_template_version)
+            if state is None:
+                print("No GDP-Web AMIs found")
+                return {'statusCode': 404, 'body': 'No GDP-Web AMIs found'}
+
+            if state['status'] == 'up_to_date':
+                print("Launch Templates already use latest AMI")
+                return {'statusCode': 200, 'body': 'Launch Template already up to date'}
+
+            # A newer AMI supersedes any rollout still running for the prefix
+            checkpoint.claim(state)
+            print(f"Planned rollout {state['rollout_id']}: {[[a['name'] for a in wave] for wave in state['waves']]}")
+
+        state = run_waves(autoscaling, state, config['waves'], remaining_ms, checkpoint.save)
+
+        if state['status'] == 'in_progress':
+            # Out of time: the checkpoint is saved, continue in a fresh invocation
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({'resume': True, 'rollout_id': state['rollout_id'],
+                                    'ami_prefix': state['ami_prefix']})
+            )
+            print(f"Rollout {state['rollout_id']} continues in a new invocation")
+
         result = {
-            'statusCode': 200,
+            'statusCode': 500 if state['status'] == 'failed' else 200,
             'body': {
-                'message': 'Launch Template updated successfully',
-                'previous_ami': current_ami,
-                'new_ami': latest_ami_id,
-                'launch_template': launch_template_name,
-                'previous_version': current_version['VersionNumber'],
-                'new_version': new_version,
-                'instance_refresh_id': refresh_id
+                'message': f"Rollout {state['status']}",
+                'rollout_id': state['rollout_id'],
+                'launch_templates': state['templates'],
+                'waves_completed': state['wave_index'],
+                'waves_total': len(state['waves']),
+                'failed_asgs': state['failed']
             }
         }
-        
-        print(f"=== UPDATE SUMMARY ===")
-        print(f"Previous AMI: {current_ami}")
-        print(f"New AMI: {latest_ami_id}")
-        print(f"Launch Template: {launch_template_name}")
-        print(f"New Version: {new_version}")
-        print(f"Instance Refresh ID: {refresh_id}")
+
+        print(f"=== ROLLOUT SUMMARY ===")
         print(f"Result: {json.dumps(result)}")
         return result
-        
+
+    except CheckpointConflict as e:
+        print(f"Stopping: {str(e)} by a newer rollout")
+        return {'statusCode': 409, 'body': {'message': f"{str(e)} by a newer rollout"}}
     except Exception as e:
         error_msg = f"Error updating launch template: {str(e)}"
         print(error_msg)
         return {
             'statusCode': 500,
             'body': {'error': error_msg}
-        }
\ No newline at end of file
+        }
@@ -54,9 +54,26 @@ cat > lambda-policy.json << 'EOF'
             "Action": [
                 "autoscaling:UpdateAutoScalingGroup",
                 "autoscaling:StartInstanceRefresh",
-                "autoscaling:DescribeAutoScalingGroups"
+                "autoscaling:CancelInstanceRefresh",
+                "autoscaling:DescribeAutoScalingGroups",
+                "autoscaling:DescribeInstanceRefreshes"
             ],
             "Resource": "*"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "dynamodb:GetItem",
+                "dynamodb:PutItem"
+            ],
+            "Resource": "arn:aws:dynamodb:*:*:table/gdp-web-ami-rollout"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "lambda:InvokeFunction"
+            ],
+            "Resource": "arn:aws:lambda:*:*:function:gdp-web-ami-update"
         }
     ]
 }
@@ -67,11 +84,19 @@ aws iam put-role-policy \
     --policy-name "AMIUpdatePolicy" \
     --policy-document file://lambda-policy.json
 
+echo "=== Creating rollout checkpoint table ==="
+# One item per AMI prefix; saves are conditional on the rollout id so a newer rollout supersedes an older one
+aws dynamodb create-table \
+    --table-name gdp-web-ami-rollout \
+    --attribute-definitions AttributeName=ami_prefix,AttributeType=S \
+    --key-schema AttributeName=ami_prefix,KeyType=HASH \
+    --billing-mode PAY_PER_REQUEST 2>/dev/null || echo "Table already exists"
+
 echo "=== Waiting for role propagation ==="
 sleep 10
 
 echo "=== Creating Lambda deployment package ==="
-zip lambda-function.zip task2-ami-update-lambda.py
+zip lambda-function.zip task2-ami-update-lambda.py rollout_orchestrator.py
 
 echo "=== Creating Lambda function ==="
 ROLE_ARN=$(aws iam get-role --role-name $ROLE_NAME --query 'Role.Arn' --output text)
@@ -82,8 +107,8 @@ aws lambda create-function \
     --role $ROLE_ARN \
     --handler task2-ami-update-lambda.lambda_handler \
     --zip-file fileb://lambda-function.zip \
-    --timeout 300 \
-    --description "Updates ASG Launch Template with latest GDP-Web AMI"
+    --timeout 900 \
+    --description "Rolls the latest GDP-Web AMIs out to the configured Launch Templates and ASGs"
 
 echo "=== Creating EventBridge Rule ==="
 aws events put-rule \